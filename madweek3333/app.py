@@ -1,26 +1,35 @@
+import time
+_import_started = time.perf_counter()  # 콜드 스타트 측정용 (APP_IMPORT_SECONDS)
+
 import os
 import uuid
 import base64
-from flask import Flask, request, jsonify
+import json
+import io
+import hashlib
+import gzip
+import math
+import unicodedata
+import threading
+from collections import deque, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import Flask, Request, request, jsonify, send_file, url_for, abort, Response, stream_with_context, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from contextlib import contextmanager
+from werkzeug.security import safe_join
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
-from flask_bcrypt import Bcrypt
+import flask_bcrypt
+import multiprocessing
 from dotenv import load_dotenv
 import pymysql
-from pytrends.request import TrendReq
-import requests
-import feedparser
-from bs4 import BeautifulSoup
-import re
-from datetime import datetime
-import urllib
-import json
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-import base64
+from pymysql.constants import SERVER_STATUS
+# 무거운 라이브러리(pytrends/pandas, requests, numpy, PIL)는 처음 쓰는 함수 안에서 import
+# -> 워커 시작 시간 단축 (startup_time.py로 측정)
 
 app = Flask(__name__)
 CORS(app)
-bcrypt = Bcrypt(app)
 load_dotenv()  # .env 파일에서 환경 변수 로드
 # ----- DB 설정 -----
 db_config = {
@@ -32,18 +41,608 @@ db_config = {
     
 }
 
+# ----- DB 커넥션 풀 설정 -----
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))                  # 프로세스당 최대 연결 수
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 5))           # 빈 연결을 기다리는 최대 시간(초)
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))       # 이보다 오래 쉰 연결은 폐기(초)
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", 30))  # 이보다 오래 쉰 연결은 ping 후 사용(초)
+
+
+class PoolTimeout(Exception):
+    """풀에서 DB_POOL_TIMEOUT 안에 연결을 얻지 못했을 때"""
+
+
+class PooledConnection:
+    """
+    풀에서 빌려온 pymysql 연결을 감싸는 객체
+    - close()를 호출하면 실제로 끊지 않고 풀에 반납
+    - cursor()는 빌릴 때 지정한 cursorclass를 기본값으로 사용
+    - 나머지 속성(commit, rollback, ...)은 원래 연결로 위임
+    """
+
+    def __init__(self, pool, connection, cursorclass=None):
+        self._pool = pool
+        self._connection = connection
+        self._cursorclass = cursorclass
+
+    def cursor(self, cursor=None):
+        return InstrumentedCursor(self._connection.cursor(cursor or self._cursorclass))
+
+    def close(self):
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise pymysql.err.InterfaceError(0, "Connection already returned to pool")
+        return getattr(self._connection, name)
+
+
+class ConnectionPool:
+    """
+    db_config 기반의 thread-safe MySQL 커넥션 풀
+    - 최대 max_size개까지만 연결을 만들고, 모두 사용 중이면 timeout까지 대기
+    - 빌려줄 때: 오래 쉰 연결은 ping으로 상태 확인, max_idle을 넘긴 연결은 폐기
+    - 반납할 때: 열린 트랜잭션은 rollback (이전 요청의 스냅샷이 다음 요청에 보이지 않도록)
+    - fork 이후에는 부모의 소켓을 공유하지 않도록 풀을 새로 시작
+    """
+
+    def __init__(self, config, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 max_idle=DB_POOL_MAX_IDLE, ping_interval=DB_POOL_PING_INTERVAL):
+        self._config = config
+        self._max_size = max_size
+        self._timeout = timeout
+        self._max_idle = max_idle
+        self._ping_interval = ping_interval
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Condition()
+        self._idle = deque()  # (connection, 마지막 사용 시각), 오른쪽이 가장 최근
+        self._size = 0        # 대여 중 + 대기 중인 연결 수
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+        }
+
+    def connect(self, cursorclass=None):
+        """풀에서 연결을 빌려옴 (pymysql.connect 대신 사용)"""
+        return PooledConnection(self, self._acquire(), cursorclass)
+
+    def _acquire(self):
+        started = time.monotonic()
+        deadline = started + self._timeout
+        waited = False
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self._max_size:
+                    # 새 연결은 락 밖에서 생성
+                    self._size += 1
+                    connection, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"DB 연결을 {self._timeout}초 안에 얻지 못했습니다.")
+                waited = True
+                self._lock.wait(remaining)
+
+            self._stats["checkouts"] += 1
+            if waited:
+                wait_time = time.monotonic() - started
+                self._stats["waits"] += 1
+                self._stats["wait_time_total"] += wait_time
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+
+        if connection is not None and not self._is_healthy(connection, last_used):
+            self._close_quietly(connection)
+            with self._lock:
+                self._stats["discarded"] += 1
+            connection = None
+
+        if connection is None:
+            try:
+                connection = pymysql.connect(**self._config)
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._lock.notify()
+                raise
+            with self._lock:
+                self._stats["created"] += 1
+        return connection
+
+    def release(self, connection):
+        """연결을 풀에 반납 (PooledConnection.close()에서 호출)"""
+        healthy = connection.open
+        if healthy and connection.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            try:
+                connection.rollback()
+            except Exception:
+                healthy = False
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 이전에 빌린 연결은 자식 프로세스의 풀에 넣지 않음
+                return
+            if healthy:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._size -= 1
+                self._stats["discarded"] += 1
+            self._lock.notify()
+        if not healthy:
+            self._close_quietly(connection)
+
+    def _evict_idle(self):
+        # 가장 오래 쉰 연결부터(왼쪽) max_idle 초과분 폐기
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self._max_idle:
+            connection, _ = self._idle.popleft()
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._close_quietly(connection)
+
+    def _is_healthy(self, connection, last_used):
+        if not connection.open:
+            return False
+        if time.monotonic() - last_used < self._ping_interval:
+            return True
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        """쉬고 있는 연결을 모두 닫음 (serve.py에서 워커 fork 전에 호출)"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def stats(self):
+        """풀 상태와 대기 지표 반환"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+            stats["max_size"] = self._max_size
+        return stats
+
+
+db_pool = ConnectionPool(db_config)
+
+
+##################################
+# 요청 계측 (/metrics)
+##################################
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", 1.0))  # 이보다 느린 요청은 구간별 시간 로그 (0이면 끔)
+# ----- 응답 직렬화 / 압축 설정 -----
+JSON_ENCODER = os.getenv("JSON_ENCODER", "orjson")                   # orjson(설치되어 있지 않으면 stdlib) 또는 stdlib
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))     # 이보다 작은 응답은 압축하지 않음(바이트)
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))      # gzip 압축 레벨 (1~9)
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 4))  # brotli 품질 (0~11), 낮을수록 빠름
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html'}
+# 지연 시간 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Prometheus 형식 히스토그램 (구간별 개수, 합계, 개수)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """
+    라우트별 요청 지표 (프로세스 단위)
+    - 요청 시간 히스토그램, 구간(db/file/upstream/json)별 시간 히스토그램
+    - 요청 수(상태 코드별), DB 쿼리 수, 응답 바이트 수
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = defaultdict(Histogram)       # route -> Histogram
+        self.spans = defaultdict(Histogram)           # (route, span) -> Histogram
+        self.requests = defaultdict(int)              # (route, method, status) -> 개수
+        self.db_queries = defaultdict(int)            # route -> 개수
+        self.response_bytes = defaultdict(int)        # route -> 바이트
+        self.compression = defaultdict(lambda: [0, 0])  # (route, encoding) -> [압축 전 바이트, 압축 후 바이트]
+
+    def record(self, route, method, status, duration, spans, db_queries, response_bytes):
+        with self._lock:
+            self.durations[route].observe(duration)
+            for name, seconds in spans.items():
+                self.spans[(route, name)].observe(seconds)
+            self.requests[(route, method, status)] += 1
+            self.db_queries[route] += db_queries
+            self.response_bytes[route] += response_bytes
+
+    def record_compression(self, route, encoding, raw_bytes, compressed_bytes):
+        with self._lock:
+            totals = self.compression[(route, encoding)]
+            totals[0] += raw_bytes
+            totals[1] += compressed_bytes
+
+    def render(self):
+        """Prometheus text exposition 형식 문자열"""
+        lines = []
+
+        def labels(**values):
+            return ",".join(f'{key}="{value}"' for key, value in values.items())
+
+        def histogram(name, help_text, items):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for label_values, hist in items:
+                cumulative = 0
+                for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels(**label_values, le=bound)}}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels(**label_values)}}} {hist.sum}")
+                lines.append(f"{name}_count{{{labels(**label_values)}}} {hist.count}")
+
+        def counter(name, help_text, items, metric_type="counter"):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for label_values, value in items:
+                lines.append(f"{name}{{{labels(**label_values)}}} {value}" if label_values else f"{name} {value}")
+
+        with self._lock:
+            histogram("http_request_duration_seconds", "Request latency by route",
+                      [({"route": route}, hist) for route, hist in sorted(self.durations.items())])
+            histogram("http_request_span_seconds", "Time spent per request in db/file/upstream/json/compress",
+                      [({"route": route, "span": span}, hist) for (route, span), hist in sorted(self.spans.items())])
+            counter("http_requests_total", "Requests by route, method and status",
+                    [({"route": r, "method": m, "status": st}, v) for (r, m, st), v in sorted(self.requests.items())])
+            counter("http_response_bytes_total", "Response body bytes by route",
+                    [({"route": route}, v) for route, v in sorted(self.response_bytes.items())])
+            counter("db_queries_total", "DB queries executed by route",
+                    [({"route": route}, v) for route, v in sorted(self.db_queries.items())])
+            compression = sorted(self.compression.items())
+            counter("http_response_uncompressed_bytes_total", "Bytes of compressed responses before compression",
+                    [({"route": r, "encoding": e}, raw) for (r, e), (raw, _) in compression])
+            counter("http_response_compressed_bytes_total", "Bytes of compressed responses after compression",
+                    [({"route": r, "encoding": e}, packed) for (r, e), (_, packed) in compression])
+            counter("http_response_compression_ratio", "Compressed / uncompressed bytes by route",
+                    [({"route": r, "encoding": e}, packed / raw if raw else 0) for (r, e), (raw, packed) in compression],
+                    "gauge")
+
+        pool_stats = db_pool.stats()
+        counter("db_pool_connections", "DB pool connections by state",
+                [({"state": state}, pool_stats[state]) for state in ("in_use", "idle", "size", "max_size")], "gauge")
+        counter("db_pool_checkouts_total", "DB pool checkouts", [({}, pool_stats["checkouts"])])
+        counter("db_pool_waits_total", "DB pool checkouts that had to wait", [({}, pool_stats["waits"])])
+        counter("db_pool_wait_seconds_total", "Total time spent waiting for a DB connection",
+                [({}, pool_stats["wait_time_total"])])
+        counter("db_pool_timeouts_total", "DB pool checkouts that timed out", [({}, pool_stats["timeouts"])])
+        counter("app_import_seconds", "Time spent importing app.py", [({}, APP_IMPORT_SECONDS)], "gauge")
+        counter("json_encoder_info", "JSON encoder in use", [({"encoder": app.json.encoder_name}, 1)], "gauge")
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+@contextmanager
+def span(name):
+    """with span('db'): ... -> 현재 요청의 name 구간 시간에 더함 (요청 밖에서는 아무것도 안 함)"""
+    if not has_request_context() or 'spans' not in g:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        g.spans[name] += time.perf_counter() - started
+
+
+class InstrumentedCursor:
+    """DB 커서 래퍼: execute/fetch 시간을 'db' 구간으로, execute 횟수를 쿼리 수로 기록"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, args=None):
+        if has_request_context() and 'db_queries' in g:
+            g.db_queries += 1
+        with span('db'):
+            return self._cursor.execute(query, args)
+
+    def executemany(self, query, args):
+        if has_request_context() and 'db_queries' in g:
+            g.db_queries += 1
+        with span('db'):
+            return self._cursor.executemany(query, args)
+
+    def fetchone(self):
+        with span('db'):
+            return self._cursor.fetchone()
+
+    def fetchall(self):
+        with span('db'):
+            return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedJSONProvider(DefaultJSONProvider):
+    """
+    jsonify 직렬화 시간을 'json' 구간으로 기록
+    - JSON_ENCODER=orjson이고 orjson이 설치되어 있으면 orjson으로 직렬화 (stdlib json보다 수 배 빠름)
+    - 키 정렬, datetime/date(HTTP 날짜), Decimal(문자열) 출력은 기본 provider와 같음
+      (datetime은 orjson 기본 ISO 형식 대신 self.default로 넘김), 한글은 \\uXXXX 대신 UTF-8 그대로
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._orjson = None
+        if JSON_ENCODER == 'orjson':
+            try:
+                import orjson
+                self._orjson = orjson
+            except ImportError:
+                pass
+
+    @property
+    def encoder_name(self):
+        return 'orjson' if self._orjson is not None else 'stdlib'
+
+    def _orjson_dumps(self, obj, indent=False):
+        orjson = self._orjson
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        # json.dumps 옵션을 직접 넘긴 경우는 기본 provider로
+        if self._orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        with span('json'):
+            if self._orjson is None:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = (self.compact is None and self._app.debug) or self.compact is False
+            return self._app.response_class(self._orjson_dumps(obj, indent) + b"\n", mimetype=self.mimetype)
+
+
+app.json = InstrumentedJSONProvider(app)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.spans = defaultdict(float)
+    g.db_queries = 0
+
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_started' not in g:
+        return response
+    duration = time.perf_counter() - g.request_started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    # 스트리밍/파일 응답은 길이를 미리 알 수 없으면 0으로 기록
+    response_bytes = response.content_length or 0
+    request_metrics.record(route, request.method, response.status_code, duration,
+                           g.spans, g.db_queries, response_bytes)
+
+    if SLOW_REQUEST_SECONDS and duration > SLOW_REQUEST_SECONDS:
+        breakdown = ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in sorted(g.spans.items()))
+        app.logger.warning(
+            "slow request %s %s %.1fms status=%s db_queries=%d bytes=%d [%s]",
+            request.method, request.path, duration * 1000, response.status_code,
+            g.db_queries, response_bytes, breakdown,
+        )
+    return response
+
+
+_brotli = None
+
+
+def get_brotli():
+    """brotli 모듈 (설치되어 있지 않으면 None), 처음 쓸 때 import"""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+            _brotli = brotli
+        except ImportError:
+            _brotli = False
+    return _brotli or None
+
+
+def negotiate_encoding():
+    """Accept-Encoding에서 사용할 압축 방식 (br > gzip), 둘 다 안 되면 None"""
+    accept = request.accept_encodings
+    if accept['br'] and get_brotli() is not None:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+# record_request_metrics보다 나중에 등록 -> 먼저 실행되므로 압축 후 크기와 'compress' 구간이 기록됨
+@app.after_request
+def compress_response(response):
+    """
+    Accept-Encoding에 따라 응답 압축 (brotli가 설치되어 있으면 br, 아니면 gzip)
+    - COMPRESS_MIN_BYTES 이상인 JSON/텍스트 응답만, 스트리밍/파일 응답은 그대로
+    - 압축하면 ETag를 약한 ETag로 (If-None-Match는 약한 비교라 304는 그대로 동작)
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    with span('compress'):
+        if encoding == 'br':
+            compressed = get_brotli().compress(body, quality=COMPRESS_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_metrics.record_compression(route, encoding, len(body), len(compressed))
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus 형식 지표 (프로세스 단위, 워커가 여러 개면 워커별로 수집)
+    """
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+##################################
+# 인기 검색어 캐시
+##################################
+TRENDING_CACHE_TTL = float(os.getenv("TRENDING_CACHE_TTL", 600))     # 이 시간 동안은 캐시 그대로 반환(초)
+TRENDING_STALE_TTL = float(os.getenv("TRENDING_STALE_TTL", 3600))    # 이 시간까지는 오래된 값을 주면서 백그라운드 갱신(초)
+
+
+class RefreshingCache:
+    """
+    값 하나를 메모리에 캐시하는 stale-while-revalidate 캐시
+    - ttl 이내: 캐시 값 반환
+    - ttl ~ stale_ttl: 캐시 값을 바로 반환하고 백그라운드 스레드 하나만 갱신
+    - 값이 없거나 stale_ttl 초과: 한 요청만 loader를 호출하고 나머지는 그 결과를 기다림
+    """
+
+    def __init__(self, loader, ttl, stale_ttl):
+        self._loader = loader
+        self._ttl = ttl
+        self._stale_ttl = max(stale_ttl, ttl)
+        self._lock = threading.Lock()          # 값/상태 보호
+        self._load_lock = threading.Lock()     # loader 동시 호출 방지
+        self._value = None
+        self._loaded_at = None
+        self._refreshing = False
+
+    def get(self):
+        now = time.monotonic()
+        with self._lock:
+            age = None if self._loaded_at is None else now - self._loaded_at
+            if age is not None and age < self._ttl:
+                return self._value
+            if age is not None and age < self._stale_ttl:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_in_background, daemon=True).start()
+                return self._value
+
+        # 캐시가 없거나 너무 오래됨 -> 동기 갱신 (이미 누가 갱신 중이면 끝날 때까지 대기)
+        with self._load_lock:
+            with self._lock:
+                if self._loaded_at is not None and time.monotonic() - self._loaded_at < self._ttl:
+                    return self._value
+            return self._load()
+
+    def _load(self):
+        value = self._loader()
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.monotonic()
+        return value
+
+    def _refresh_in_background(self):
+        try:
+            with self._load_lock:
+                self._load()
+        except Exception:
+            pass  # 갱신 실패 시 기존 값을 계속 사용, 다음 요청에서 다시 시도
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+
+_pytrends = None
+
+
+def fetch_trending_searches():
+    """Google Trends에서 South Korea 인기 검색어 조회 (TrendReq 세션 재사용)"""
+    global _pytrends
+    if _pytrends is None:
+        from pytrends.request import TrendReq  # pandas까지 같이 로드되므로 처음 쓸 때 import
+
+        # Pytrends 설정
+        _pytrends = TrendReq(hl='ko-KR', tz=540)
+    with span('upstream'):
+        df = _pytrends.trending_searches(pn='south_korea')  # South Korea의 인기 검색어
+
+    # 데이터프레임을 리스트로 변환
+    return df[0].tolist()
+
+
+trending_cache = RefreshingCache(fetch_trending_searches, TRENDING_CACHE_TTL, TRENDING_STALE_TTL)
+
+
 @app.route('/trending_searches', methods=['GET'])
 def get_trending_searches():
     """
     Google Trends의 South Korea 인기 검색어를 반환
+    - trending_cache에서 반환, 만료 시 백그라운드에서 갱신
     """
     try:
-        # Pytrends 설정
-        pytrends = TrendReq(hl='ko-KR', tz=540)
-        df = pytrends.trending_searches(pn='south_korea')  # South Korea의 인기 검색어
-
-        # 데이터프레임을 리스트로 변환
-        trending_searches = df[0].tolist()
+        trending_searches = trending_cache.get()
 
         return jsonify({
             "success": True,
@@ -62,20 +661,131 @@ CLIENT_SECRET = 'S0nCIcmrWG'
 # 네이버 뉴스 검색 API URL
 API_URL = 'https://openapi.naver.com/v1/search/news.json'
 
-@app.route('/search', methods=['GET'])
-def search_news():
-    # 쿼리 파라미터 받기
-    query = request.args.get('query', '집')  # 기본값 '부동산'
-    display = request.args.get('display', 10)  # 기본값 10
-    start = request.args.get('start', 1)      # 기본값 1
-    sort = request.args.get('sort', 'sim')    # 기본값 sim
+# ----- 네이버 API 세션 / 캐시 설정 -----
+NAVER_POOL_SIZE = int(os.getenv("NAVER_POOL_SIZE", 10))              # keep-alive 연결 수
+NAVER_TIMEOUT = (float(os.getenv("NAVER_CONNECT_TIMEOUT", 3)),       # (연결, 읽기) 타임아웃(초)
+                 float(os.getenv("NAVER_READ_TIMEOUT", 5)))
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", 300))             # 검색 결과 캐시 시간(초)
+NEWS_CACHE_SIZE = int(os.getenv("NEWS_CACHE_SIZE", 512))             # 캐시할 (query, display, start, sort) 조합 수
+NEWS_BATCH_CONCURRENCY = int(os.getenv("NEWS_BATCH_CONCURRENCY", 8))  # /search/batch 동시 upstream 요청 수
+NEWS_BATCH_MAX_QUERIES = int(os.getenv("NEWS_BATCH_MAX_QUERIES", 20)) # /search/batch 한 번에 받는 최대 검색어 수
+
+
+class UpstreamError(Exception):
+    """외부 API가 200이 아닌 응답을 주거나 요청이 실패했을 때"""
 
-    # 헤더 구성
-    headers = {
+    def __init__(self, status_code, message="Failed to fetch data"):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TTLCache:
+    """
+    키별 LRU + TTL 캐시
+    - maxsize를 넘으면 가장 오래 안 쓴 키부터 제거
+    - 같은 키를 동시에 요청하면 loader는 한 번만 호출하고 나머지는 그 결과를 공유
+    - loader가 예외를 던지면 캐시하지 않고 기다리던 요청에도 같은 예외 전달
+    """
+
+    class _InFlight:
+        def __init__(self):
+            self.event = threading.Event()
+            self.value = None
+            self.error = None
+
+    def __init__(self, maxsize, ttl):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (저장 시각, 값)
+        self._inflight = {}
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self._ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = self._inflight[key] = self._InFlight()
+
+        if not owner:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.value
+
+        try:
+            inflight.value = loader()
+            with self._lock:
+                self._entries[key] = (time.monotonic(), inflight.value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+            return inflight.value
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            inflight.event.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_naver_session = None
+_naver_session_lock = threading.Lock()
+
+
+def get_naver_session():
+    """keep-alive 연결을 재사용하는 세션 (요청마다 TCP/TLS 연결을 새로 맺지 않음), 처음 쓸 때 생성"""
+    global _naver_session
+    with _naver_session_lock:
+        if _naver_session is None:
+            _naver_session = _create_naver_session()
+        return _naver_session
+
+
+def _create_naver_session():
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=NAVER_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.headers.update({
         "X-Naver-Client-Id": CLIENT_ID,
         "X-Naver-Client-Secret": CLIENT_SECRET
-    }
+    })
+    return session
+
+
+news_cache = TTLCache(NEWS_CACHE_SIZE, NEWS_CACHE_TTL)
+# 배치 검색용 스레드 풀 (모든 요청이 공유하므로 프로세스 전체의 동시 upstream 요청 수가 제한됨)
+news_executor = ThreadPoolExecutor(max_workers=NEWS_BATCH_CONCURRENCY, thread_name_prefix='naver')
 
+
+def dedupe_by_title(items, seen_titles=None):
+    """제목 기준 중복 제거 (seen_titles를 넘기면 여러 목록에 걸쳐 중복 제거)"""
+    if seen_titles is None:
+        seen_titles = set()
+    unique_items = []
+    for item in items:
+        if item["title"] not in seen_titles:
+            unique_items.append(item)
+            seen_titles.add(item["title"])
+    return unique_items
+
+
+def fetch_news(query, display, start, sort):
+    """
+    네이버 뉴스 검색 결과(제목, 링크)를 제목 기준 중복 제거해서 반환
+    - 실패 시 UpstreamError (응답 본문이 JSON이 아니거나 형식이 다르면 502)
+    """
     # 요청 파라미터 구성
     params = {
         "query": query,
@@ -84,26 +794,174 @@ def search_news():
         "sort": sort
     }
 
+    import requests
+
     # 네이버 API 요청
-    response = requests.get(API_URL, headers=headers, params=params)
+    try:
+        with span('upstream'):
+            response = get_naver_session().get(API_URL, params=params, timeout=NAVER_TIMEOUT)
+    except requests.Timeout:
+        raise UpstreamError(504)
+    except requests.RequestException:
+        raise UpstreamError(502)
 
-    if response.status_code == 200:
-        data = response.json()
+    if response.status_code != 200:
+        raise UpstreamError(response.status_code)
 
-        # 뉴스 제목과 링크 추출
+    # 뉴스 제목과 링크 추출
+    try:
+        data = response.json()
         raw_items = [{"title": item["title"], "link": item["link"]} for item in data.get("items", [])]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise UpstreamError(502)
 
-        # 중복 제거: 제목을 기준으로
-        seen_titles = set()
-        unique_items = []
-        for item in raw_items:
-            if item["title"] not in seen_titles:
-                unique_items.append(item)
-                seen_titles.add(item["title"])
+    # 중복 제거: 제목을 기준으로
+    return dedupe_by_title(raw_items)
 
-        return jsonify(unique_items)
-    else:
-        return jsonify({"error": "Failed to fetch data", "status_code": response.status_code}), response.status_code
+
+def search_news_cached(query, display, start, sort):
+    """(query, display, start, sort)별로 news_cache에 캐시된 fetch_news"""
+    key = (query, str(display), str(start), sort)
+    return news_cache.get_or_load(key, lambda: fetch_news(query, display, start, sort))
+
+
+@app.route('/search', methods=['GET'])
+def search_news():
+    # 쿼리 파라미터 받기
+    query = request.args.get('query', '집')  # 기본값 '부동산'
+    display = request.args.get('display', 10)  # 기본값 10
+    start = request.args.get('start', 1)      # 기본값 1
+    sort = request.args.get('sort', 'sim')    # 기본값 sim
+
+    try:
+        unique_items = search_news_cached(query, display, start, sort)
+    except UpstreamError as e:
+        return jsonify({"error": str(e), "status_code": e.status_code}), e.status_code
+
+    return jsonify(unique_items)
+
+
+@app.route('/search/batch', methods=['POST'])
+def search_news_batch():
+    """
+    - JSON: { "queries": ["강남 원룸", "신촌 하숙"], "display": 10, "start": 1, "sort": "sim", "dedupe_across": false }
+    - 여러 검색어를 네이버 API에 동시에 요청 (최대 NEWS_BATCH_CONCURRENCY개씩)
+    - 검색어별로 제목 중복 제거, dedupe_across=true 이면 앞 검색어에 나온 제목도 제외 (JSON boolean만 허용)
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({"success": False, "message": "No JSON data provided"}), 400
+
+    queries = data.get('queries')
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"success": False, "message": "queries는 검색어 목록이어야 합니다."}), 400
+    if len(queries) > NEWS_BATCH_MAX_QUERIES:
+        return jsonify({"success": False, "message": f"검색어는 최대 {NEWS_BATCH_MAX_QUERIES}개까지 가능합니다."}), 400
+
+    display = data.get('display', 10)
+    start = data.get('start', 1)
+    sort = data.get('sort', 'sim')
+    dedupe_across = data.get('dedupe_across', False)
+    if not isinstance(dedupe_across, bool):
+        return jsonify({"success": False, "message": "dedupe_across는 true 또는 false여야 합니다."}), 400
+
+    futures = [
+        news_executor.submit(search_news_cached, str(query), display, start, sort)
+        for query in queries
+    ]
+
+    results = []
+    seen_titles = set()
+    for query, future in zip(queries, futures):
+        try:
+            items = future.result()
+        except UpstreamError as e:
+            results.append({"query": query, "error": str(e), "status_code": e.status_code})
+            continue
+        if dedupe_across:
+            # 캐시된 목록은 그대로 두고 새 목록을 만듦
+            items = dedupe_by_title(items, seen_titles)
+        results.append({"query": query, "items": items})
+
+    return jsonify({
+        "success": True,
+        "results": results
+    }), 200
+
+
+##################################
+# 비밀번호 해시 (bcrypt) 워커 풀
+##################################
+BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))          # bcrypt cost, 바꾸면 로그인 시 재해시
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", os.cpu_count() or 1))  # 프로세스당 해시 프로세스 수, 0이면 요청 스레드에서 직접 계산 (serve.py는 코어 수 // 워커 수로 설정)
+BCRYPT_QUEUE_LIMIT = int(os.getenv("BCRYPT_QUEUE_LIMIT", 32))        # 워커가 모두 바쁠 때 대기 가능한 작업 수
+
+
+class PasswordHasherBusy(Exception):
+    """해시 워커와 대기열이 모두 찼을 때 (바로 503 응답)"""
+
+
+class PasswordHasher:
+    """
+    bcrypt 해시/검증을 별도 프로세스 풀에서 실행
+    - 요청 스레드는 결과만 기다리므로 해시 계산 중에도 다른 요청은 GIL 경쟁 없이 처리됨
+    - 실행 중 + 대기 중 작업이 workers + queue_limit을 넘으면 PasswordHasherBusy
+    - 프로세스 풀은 처음 사용할 때 만듦 (fork 이후 각 워커 프로세스가 자기 풀을 가짐)
+    """
+
+    def __init__(self, rounds=BCRYPT_LOG_ROUNDS, workers=BCRYPT_WORKERS, queue_limit=BCRYPT_QUEUE_LIMIT):
+        self.rounds = rounds
+        self._workers = workers
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_limit)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # 스레드가 있는 프로세스에서 fork하면 교착될 수 있으므로 spawn 사용
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if self._workers <= 0:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("요청이 많아 잠시 후 다시 시도해주세요.")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # 워커 프로세스가 죽으면 풀을 버리고 다음 요청에서 새로 만듦
+            with self._lock:
+                self._executor = None
+            raise
+
+    def hash(self, password):
+        return self._run(flask_bcrypt.generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def check(self, pw_hash, password):
+        return self._run(flask_bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """저장된 해시의 cost가 현재 설정(BCRYPT_LOG_ROUNDS)과 다른지 ($2b$<cost>$...)"""
+        try:
+            return int(pw_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+
+password_hasher = PasswordHasher()
 
 
 ##################################
@@ -116,9 +974,6 @@ def add_user():
     - JSON 데이터로 처리
     """
     try:
-        connection = pymysql.connect(**db_config)
-        cursor = connection.cursor()
-
         # 요청 JSON 데이터 가져오기
         data = request.get_json()
         if not data:
@@ -131,18 +986,25 @@ def add_user():
         if not username or not password:
             return jsonify({"success": False, "message": "아이디와 비밀번호는 필수입니다."}), 400
 
-        # 비밀번호 해시
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        # 비밀번호 해시 (워커 프로세스에서 계산, 그동안 DB 연결은 잡지 않음)
+        hashed_password = password_hasher.hash(password)
+
+        connection = db_pool.connect()
+        cursor = connection.cursor()
 
         query = """
             INSERT INTO User (username, password, name)
             VALUES (%s, %s, %s)
         """
         cursor.execute(query, (username, hashed_password, name))
+        # 리뷰 집계 행도 같은 트랜잭션에서 생성 (/profile_detail이 집계 행 하나로 리뷰 수를 판단)
+        cursor.execute("INSERT INTO UserReviewStats (user_id) VALUES (%s)", (cursor.lastrowid,))
         connection.commit()
 
         return jsonify({"success": True, "message": "회원가입 성공!"}), 201
 
+    except PasswordHasherBusy as e:
+        return jsonify({"success": False, "message": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         if 'connection' in locals():
             connection.rollback()
@@ -154,6 +1016,24 @@ def add_user():
 ##################################
 # 2) 로그인
 ##################################
+def rehash_password(user_id, password):
+    """
+    저장된 해시의 cost가 BCRYPT_LOG_ROUNDS와 다르면 로그인 성공 시 새 cost로 다시 저장
+    - 실패해도 로그인은 성공 처리 (다음 로그인 때 다시 시도)
+    """
+    try:
+        new_hash = password_hasher.hash(password)
+        connection = db_pool.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("UPDATE User SET password = %s WHERE user_id = %s", (new_hash, user_id))
+            connection.commit()
+        finally:
+            connection.close()
+    except Exception:
+        pass
+
+
 @app.route("/login", methods=["POST"])
 def login():
     """
@@ -161,7 +1041,7 @@ def login():
     - JSON 데이터로 처리
     """
     try:
-        connection = pymysql.connect(**db_config)
+        connection = db_pool.connect()
         cursor = connection.cursor()
 
         data = request.get_json()  # JSON 데이터 가져오기
@@ -183,9 +1063,13 @@ def login():
             return jsonify({"success": False, "message": "존재하지 않는 사용자입니다."}), 404
 
         db_user_id, db_username, db_hashed_password, db_name = result
+        # 해시 검증 동안 연결을 붙잡지 않도록 먼저 반납
+        connection.close()
 
-        # 비밀번호 검증
-        if bcrypt.check_password_hash(db_hashed_password, password):
+        # 비밀번호 검증 (워커 프로세스에서 계산)
+        if password_hasher.check(db_hashed_password, password):
+            if password_hasher.needs_rehash(db_hashed_password):
+                rehash_password(db_user_id, password)
             return jsonify({
                 "success": True,
                 "message": "로그인 성공",
@@ -196,28 +1080,308 @@ def login():
         else:
             return jsonify({"success": False, "message": "비밀번호가 틀립니다."}), 401
 
+    except PasswordHasherBusy as e:
+        return jsonify({"success": False, "message": str(e)}), 503, {"Retry-After": "1"}
     except Exception as e:
         return jsonify({"success": False, "message": str(e), "user_id": db_user_id}), 500
     finally:
         if 'connection' in locals():
             connection.close()
 
+##################################
+# 프로필 사진 저장소 (내용 주소 + 썸네일)
+##################################
+UPLOAD_FOLDER = 'uploads'
+THUMBNAIL_FOLDER = os.path.join(UPLOAD_FOLDER, 'thumbs')
+# 용도별 썸네일 최대 크기 (비율 유지)
+PHOTO_VARIANTS = {
+    'list': (160, 160),     # 목록 (/all_users)
+    'card': (480, 480),     # 추천 카드 (/recommend_roommates)
+    'detail': (1080, 1080), # 상세 화면 (/profile_detail)
+}
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", 85))
+# 파일 이름이 해시(또는 uuid)라 내용이 바뀌지 않으므로 오래 캐시해도 됨
+PHOTO_CACHE_MAX_AGE = int(os.getenv("PHOTO_CACHE_MAX_AGE", 31536000))
+PHOTO_MAX_BYTES = int(os.getenv("PHOTO_MAX_BYTES", 10 * 1024 * 1024))  # 업로드 사진 최대 크기(바이트)
+UPLOAD_CHUNK_SIZE = 64 * 1024  # 업로드 본문을 디스크에 쓰는 단위(바이트)
+
+
+def _write_file_atomic(path, data):
+    # 다른 요청이 같은 파일을 동시에 써도 깨진 파일이 보이지 않도록 임시 파일 후 rename
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with span('file'):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def photo_variant_path(photo_url, variant):
+    """원본 경로(uploads/<sha256>.<ext>)에 대응하는 썸네일 경로"""
+    digest = os.path.splitext(os.path.basename(photo_url))[0]
+    return os.path.join(THUMBNAIL_FOLDER, f"{digest}_{variant}.jpg")
+
+
+class HashingUpload:
+    """
+    업로드 파일을 UPLOAD_FOLDER의 임시 파일에 바로 쓰면서 SHA-256을 함께 계산
+    - 전체 파일을 메모리에 올리지 않음, max_bytes를 넘으면 RequestEntityTooLarge (413)
+    - store_uploaded_image가 해시 이름으로 옮김, 남은 임시 파일은 요청이 끝날 때 삭제
+    """
+
+    def __init__(self, max_bytes=PHOTO_MAX_BYTES):
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        self.path = os.path.join(UPLOAD_FOLDER, f".upload-{uuid.uuid4().hex}.tmp")
+        self.size = 0
+        self._max_bytes = max_bytes
+        self._hash = hashlib.sha256()
+        self._file = open(self.path, 'w+b')
+        if has_request_context():
+            g.setdefault('uploads', []).append(self)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self._max_bytes:
+            raise RequestEntityTooLarge(f"사진은 최대 {self._max_bytes} 바이트까지 가능합니다.")
+        self._hash.update(data)
+        with span('file'):
+            return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def discard(self):
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __getattr__(self, name):
+        # read/seek/readline 등은 임시 파일로 위임 (werkzeug FileStorage가 사용)
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """multipart 파일 파트를 메모리(또는 익명 임시 파일) 대신 HashingUpload로 바로 디스크에 씀"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingUpload()
+
+
+app.request_class = UploadRequest
+
+
+@app.teardown_request
+def discard_uploads(_):
+    # 저장소로 옮기지 않은 임시 파일(오류, 크기 초과 등) 삭제
+    for upload in g.pop('uploads', []):
+        upload.discard()
+
+
+def _prepare_image(image):
+    """
+    JPEG은 가장 큰 썸네일 크기에 맞춰 축소 디코딩(draft) -> 큰 사진도 메모리/CPU 사용이 작음
+    - 깨진 이미지는 여기서 예외
+    """
+    image.draft('RGB', max(PHOTO_VARIANTS.values()))
+    image.load()
+
+
+def _create_thumbnails(image, original_path):
+    """PHOTO_VARIANTS 썸네일 생성 (이미 있으면 건너뜀)"""
+    from PIL import Image, ImageOps
+
+    os.makedirs(THUMBNAIL_FOLDER, exist_ok=True)
+
+    # 휴대폰 사진의 EXIF 회전 정보 반영
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        # JPEG은 투명도를 지원하지 않으므로 흰 배경에 합성
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        image = image.convert('RGBA')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+
+    for variant, size in PHOTO_VARIANTS.items():
+        variant_path = photo_variant_path(original_path, variant)
+        if os.path.exists(variant_path):
+            continue
+        thumbnail = image.copy()
+        thumbnail.thumbnail(size, Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, format='JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+        _write_file_atomic(variant_path, buffer.getvalue())
+
+
+def store_profile_image(image_bytes):
+    """
+    업로드된 이미지를 SHA-256 해시 이름으로 저장하고 PHOTO_VARIANTS 썸네일 생성
+    - 같은 이미지는 한 번만 저장 (이미 있으면 다시 쓰지 않음)
+    - 반환값: DB photo_url에 저장할 원본 경로 (썸네일 경로는 photo_variant_path로 계산)
+    """
+    from PIL import Image
+
+    digest = hashlib.sha256(image_bytes).hexdigest()
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        _prepare_image(image)
+        file_extension = (image.format or 'jpeg').lower()
+        original_path = os.path.join(UPLOAD_FOLDER, f"{digest}.{file_extension}")
+
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        if not os.path.exists(original_path):
+            _write_file_atomic(original_path, image_bytes)
+        _create_thumbnails(image, original_path)
+
+    return original_path
+
+
+def store_uploaded_image(upload):
+    """
+    store_profile_image의 스트리밍 버전: 디스크에 받아 둔 HashingUpload를 해시 이름으로 옮김
+    - 해시는 받으면서 이미 계산했으므로 파일을 다시 읽지 않음
+    - 썸네일은 파일에서 바로 디코딩
+    """
+    from PIL import Image
+
+    upload.flush()
+    with Image.open(upload.path) as image:
+        _prepare_image(image)
+        file_extension = (image.format or 'jpeg').lower()
+        original_path = os.path.join(UPLOAD_FOLDER, f"{upload.hexdigest()}.{file_extension}")
+        _create_thumbnails(image, original_path)
+
+    if os.path.exists(original_path):
+        upload.discard()
+    else:
+        upload.close()
+        with span('file'):
+            os.replace(upload.path, original_path)
+    return original_path
+
+
+def resolve_photo_path(photo_url, variant=None):
+    """썸네일이 있으면 썸네일 경로, 없으면(예전 업로드 등) 원본 경로"""
+    if photo_url and variant:
+        variant_path = photo_variant_path(photo_url, variant)
+        if os.path.exists(variant_path):
+            return variant_path
+    return photo_url
+
+
+def load_photo_base64(photo_url, variant=None):
+    """photo_url(또는 그 썸네일)을 Base64 문자열로, 파일이 없으면 None"""
+    photo_path = resolve_photo_path(photo_url, variant)
+    if not photo_path:
+        return None
+    try:
+        with span('file'):
+            with open(photo_path, 'rb') as img_file:
+                photo_bytes = img_file.read()
+    except OSError:
+        return None
+    return base64.b64encode(photo_bytes).decode('utf-8')
+
+
+def wants_photo_url(data=None, args=None):
+    """
+    응답에 photo_base64 대신 사진 URL을 넣을지 여부
+    - 쿼리 ?photo=url 또는 JSON { "photo": "url" }
+    - args: 쿼리 파라미터 (기본값 request.args, asgi_app.py에서 넘김)
+    """
+    mode = (request.args if args is None else args).get('photo') or (data or {}).get('photo')
+    return mode == 'url'
+
+
+def attach_photo(row, variant, as_url=False):
+    """
+    row에 사진 추가
+    - as_url=False: 기존처럼 photo_base64 (이미지를 JSON에 포함)
+    - as_url=True: photo_image_url (/photos 엔드포인트 주소, 클라이언트/프록시 캐시 가능)
+    """
+    photo_url = row.get('photo_url')
+    if as_url:
+        row['photo_image_url'] = url_for(
+            'get_photo', filename=os.path.basename(photo_url), variant=variant, _external=True
+        ) if photo_url else None
+    else:
+        row['photo_base64'] = load_photo_base64(photo_url, variant)
+
+
+@app.route('/photos/<path:filename>', methods=['GET'])
+def get_photo(filename):
+    """
+    업로드된 프로필 사진 파일 반환
+    - ?variant=list|card|detail 이면 해당 썸네일 (없으면 원본)
+    - ETag/Last-Modified + 조건부 요청(304), 긴 Cache-Control
+    - WSGI 서버가 wsgi.file_wrapper를 지원하면 sendfile로 전송
+    """
+    variant = request.args.get('variant')
+    if variant and variant not in PHOTO_VARIANTS:
+        return jsonify({"success": False, "message": "variant는 list, card, detail 중 하나여야 합니다."}), 400
+
+    photo_url = safe_join(UPLOAD_FOLDER, filename)
+    if photo_url is None:
+        abort(404)
+    photo_path = os.path.abspath(resolve_photo_path(photo_url, variant))
+    if not os.path.isfile(photo_path):
+        abort(404)
+
+    response = send_file(photo_path, conditional=True, etag=True, max_age=PHOTO_CACHE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 ##################################
 # 3) 프로필 등록 (마이페이지 저장)
 ##################################
+def read_profile_request():
+    """
+    /profile 요청 -> (data, upload)
+    - JSON: 기존 형식 (profile_image는 Base64 data URI), upload는 None
+    - multipart/form-data: 텍스트 필드는 data, 파일 파트 profile_image는 디스크에 스트리밍된 HashingUpload
+    """
+    if request.mimetype == 'multipart/form-data':
+        file = request.files.get('profile_image')
+        upload = file.stream if file is not None and file.stream.size > 0 else None
+        return request.form.to_dict(), upload
+    return request.get_json(), None
+
+
+def refresh_profile_indexes(user_id, age, is_smoking, snoring, budget, introduction, wishes, preferred_region):
+    """
+    프로필 저장(커밋) 후 메모리 인덱스 갱신
+    - 이미 커밋된 저장이므로 인덱스 오류는 기록만 하고 응답에는 영향을 주지 않음 (TTL 재구축 때 DB와 다시 맞춰짐)
+    """
+    updates = [
+        ('roommate_index', lambda: roommate_index.upsert(user_id, age, is_smoking, snoring, budget)),
+        ('text_index', lambda: text_index.upsert(user_id, introduction, wishes, preferred_region)),
+        ('geo_index', lambda: geo_index.set_user_region(user_id, preferred_region)),
+    ]
+    for name, update in updates:
+        try:
+            update()
+        except Exception:
+            app.logger.exception("failed to update %s for user %s", name, user_id)
+
+
 @app.route('/profile', methods=['PUT'])
 def save_or_update_profile():
     """
     - user_id(필수) + 프로필 상세정보를 받아 UserProfile 테이블에 INSERT 또는 UPDATE
-    - Base64로 인코딩된 이미지를 받아서 서버에 저장 -> photo_url 에 경로 저장
+    - JSON: Base64로 인코딩된 이미지(profile_image)를 받아서 서버에 저장 -> photo_url 에 경로 저장
+    - multipart/form-data: 같은 이름의 폼 필드 + 파일 파트 profile_image
+      (본문을 메모리에 올리지 않고 디스크에 바로 쓰면서 해시 계산, PHOTO_MAX_BYTES 초과 시 413)
+    - 저장 시 목록/카드/상세용 썸네일 생성 (PHOTO_VARIANTS)
+    - 본문 읽기/이미지 저장이 끝난 뒤에 DB 연결을 잡음 (느린 업로드가 풀을 점유하지 않도록)
     """
     try:
-        # 데이터베이스 연결 (DictCursor 사용)
-        connection = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
-        cursor = connection.cursor()
-
         # 요청 데이터 가져오기
-        data = request.get_json()
+        try:
+            data, upload = read_profile_request()
+        except RequestEntityTooLarge as e:
+            return jsonify({"success": False, "message": e.description}), 413
         if not data:
             return jsonify({"success": False, "message": "No JSON data provided"}), 400
 
@@ -241,27 +1405,27 @@ def save_or_update_profile():
         is_smoking = 1 if is_smoking_str == '1' else 0
         snoring = 1 if snoring_str == '1' else 0
 
-        # Base64 이미지 처리
+        # 이미지 처리 (multipart 파일 또는 Base64)
         photo_url = None
-        if profile_image_base64:
+        if upload is not None:
+            try:
+                photo_url = store_uploaded_image(upload)
+            except Exception as e:
+                return jsonify({"success": False, "message": f"이미지 처리 중 오류 발생: {str(e)}"}), 400
+        elif profile_image_base64:
             try:
-                UPLOAD_FOLDER = 'uploads'
-                if not os.path.exists(UPLOAD_FOLDER):
-                    os.makedirs(UPLOAD_FOLDER)
-
                 header, encoded = profile_image_base64.split(',', 1)
-                file_extension = header.split('/')[1].split(';')[0]  # 예: jpeg, png 등
-                filename = f"{uuid.uuid4()}.{file_extension}"
-                save_path = os.path.join(UPLOAD_FOLDER, filename)
 
-                with open(save_path, "wb") as f:
-                    f.write(base64.b64decode(encoded))
-
-                # DB에는 이미지 파일 경로를 저장
-                photo_url = save_path
+                # 원본은 해시 이름으로 한 번만 저장, 썸네일도 함께 생성
+                # DB에는 원본 이미지 파일 경로를 저장
+                photo_url = store_profile_image(base64.b64decode(encoded))
             except Exception as e:
                 return jsonify({"success": False, "message": f"이미지 처리 중 오류 발생: {str(e)}"}), 400
 
+        # 데이터베이스 연결 (DictCursor 사용)
+        connection = db_pool.connect(cursorclass=pymysql.cursors.DictCursor)
+        cursor = connection.cursor()
+
         # 동일한 user_id가 있는지 확인
         check_query = "SELECT profile_id FROM UserProfile WHERE user_id = %s"
         cursor.execute(check_query, (user_id,))
@@ -288,6 +1452,8 @@ def save_or_update_profile():
                 introduction, wishes, preferred_region, budget, user_id
             ))
             connection.commit()
+            refresh_profile_indexes(user_id, age, is_smoking, snoring, budget,
+                                    introduction, wishes, preferred_region)
 
             return jsonify({
                 "success": True,
@@ -315,6 +1481,8 @@ def save_or_update_profile():
                 introduction, wishes, preferred_region, budget
             ))
             connection.commit()
+            refresh_profile_indexes(user_id, age, is_smoking, snoring, budget,
+                                    introduction, wishes, preferred_region)
             new_profile_id = cursor.lastrowid
 
             return jsonify({
@@ -333,32 +1501,107 @@ def save_or_update_profile():
             connection.close()
 
 
-
-##################################
-# 4) 특정 유저의 프로필 상세 + 리뷰 조회
-##################################
-@app.route('/profile_detail', methods=['POST'])
-def get_profile_detail():
+@app.route('/profile/photo', methods=['PUT'])
+def upload_profile_photo():
     """
-    - POST Body(JSON): { "user_id": 15 }
-    - user_id에 맞는 프로필 정보를 반환, photo_url을 Base64 인코딩으로 반환
-    - 리뷰 정보도 추가 반환
+    - ?user_id= + 요청 본문이 이미지 파일 그대로 (Content-Type: image/jpeg 등)
+    - 본문을 UPLOAD_CHUNK_SIZE씩 디스크에 쓰면서 해시 계산 (PHOTO_MAX_BYTES 초과 시 413)
+    - 프로필의 photo_url만 바꿈 (프로필이 없으면 404)
     """
     try:
-        connection = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({"success": False, "message": "user_id is required"}), 400
+        if request.content_length is not None and request.content_length > PHOTO_MAX_BYTES:
+            return jsonify({"success": False, "message": f"사진은 최대 {PHOTO_MAX_BYTES} 바이트까지 가능합니다."}), 413
+
+        upload = HashingUpload()
+        try:
+            while True:
+                chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                upload.write(chunk)
+        except RequestEntityTooLarge as e:
+            return jsonify({"success": False, "message": e.description}), 413
+        if upload.size == 0:
+            return jsonify({"success": False, "message": "이미지 파일이 비어 있습니다."}), 400
+
+        # 썸네일 생성까지 끝낸 뒤에 DB 연결을 잡음
+        try:
+            photo_url = store_uploaded_image(upload)
+        except Exception as e:
+            return jsonify({"success": False, "message": f"이미지 처리 중 오류 발생: {str(e)}"}), 400
+
+        connection = db_pool.connect()
         cursor = connection.cursor()
+        cursor.execute("SELECT profile_id FROM UserProfile WHERE user_id = %s", (user_id,))
+        if cursor.fetchone() is None:
+            return jsonify({"success": False, "message": "사용자 프로필을 찾을 수 없습니다."}), 404
 
-        data = request.get_json()
-        if not data:
-            return jsonify({"success": False, "message": "No JSON data provided"}), 400
+        cursor.execute(
+            "UPDATE UserProfile SET photo_url = %s, updated_at = NOW() WHERE user_id = %s",
+            (photo_url, user_id)
+        )
+        connection.commit()
 
-        user_id = data.get('user_id')
-        if not user_id:
-            return jsonify({"success": False, "message": "user_id is required"}), 400
+        return jsonify({
+            "success": True,
+            "message": "프로필 사진이 변경되었습니다.",
+            "photo_url": photo_url
+        }), 200
 
-        # 유저 + 프로필 조회
-        query_profile = """
-            SELECT 
+    except Exception as e:
+        if 'connection' in locals():
+            connection.rollback()
+        return jsonify({"success": False, "message": str(e)}), 500
+
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+##################################
+# 4) 특정 유저의 프로필 상세 + 리뷰 조회
+##################################
+PROFILE_REVIEWS_DEFAULT = 20   # /profile_detail 리뷰 기본 개수
+PROFILE_REVIEWS_MAX = 100
+
+
+@app.route('/profile_detail', methods=['POST'])
+def get_profile_detail():
+    """
+    - POST Body(JSON): { "user_id": 15, "review_limit": 20, "review_before": 1234 }
+    - user_id에 맞는 프로필 정보를 반환, photo_url을 Base64 인코딩으로 반환
+    - 리뷰 집계(개수, 평균 평점)는 UserReviewStats에서 프로필과 같은 쿼리로 조회
+      (모든 유저에게 집계 행이 있음: 마이그레이션이 0으로 채우고 /add_user가 생성,
+       그래도 없으면 Review에서 직접 집계 -> 마이그레이션 전에 쓴 리뷰도 표시)
+    - 리뷰는 최신순으로 review_limit개씩, 다음 페이지는 next_review_before를 review_before로 전달
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"success": False, "message": "No JSON data provided"}), 400
+
+        user_id = data.get('user_id')
+        if not user_id:
+            return jsonify({"success": False, "message": "user_id is required"}), 400
+
+        try:
+            review_limit = int(data.get('review_limit', PROFILE_REVIEWS_DEFAULT))
+            review_before = data.get('review_before')
+            review_before = int(review_before) if review_before is not None else None
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "message": "review_limit, review_before는 숫자여야 합니다."}), 400
+        if not (0 <= review_limit <= PROFILE_REVIEWS_MAX):
+            return jsonify({"success": False, "message": f"review_limit은 0~{PROFILE_REVIEWS_MAX} 사이의 값이어야 합니다."}), 400
+
+        connection = db_pool.connect(cursorclass=pymysql.cursors.DictCursor)
+        cursor = connection.cursor()
+
+        # 유저 + 프로필 + 리뷰 집계 조회
+        query_profile = """
+            SELECT 
                 U.user_id,
                 U.username,
                 U.name,
@@ -373,10 +1616,14 @@ def get_profile_detail():
                 P.preferred_region,
                 P.budget,
                 P.created_at,
-                P.updated_at
+                P.updated_at,
+                S.review_count,
+                S.rating_sum
             FROM UserProfile AS P
             JOIN User AS U
               ON P.user_id = U.user_id
+            LEFT JOIN UserReviewStats AS S
+              ON S.user_id = U.user_id
             WHERE U.user_id = %s
         """
         cursor.execute(query_profile, (user_id,))
@@ -385,34 +1632,56 @@ def get_profile_detail():
         if not profile_row:
             return jsonify({"success": False, "message": "해당 유저의 프로필이 존재하지 않습니다."}), 404
 
-        # Base64로 변환
-        if profile_row.get('photo_url'):
-            try:
-                with open(profile_row['photo_url'], 'rb') as image_file:
-                    photo_base64 = base64.b64encode(image_file.read()).decode('utf-8')
-                profile_row['photo_base64'] = photo_base64
-            except FileNotFoundError:
-                profile_row['photo_base64'] = None
-        else:
-            profile_row['photo_base64'] = None
-
-        # 리뷰 조회
-        query_reviews = """
-            SELECT 
-                R.review_id,
-                R.content,
-                R.rating,
-                R.created_at
-            FROM Review AS R
-            WHERE R.reviewee_id = %s
-        """
-        cursor.execute(query_reviews, (user_id,))
-        reviews = cursor.fetchall()
+        review_count = profile_row.pop('review_count')
+        rating_sum = profile_row.pop('rating_sum')
+        if review_count is None:
+            # 집계 행이 없으면 0으로 보지 않고 Review에서 직접 집계
+            cursor.execute(
+                "SELECT COUNT(*) AS review_count, SUM(rating) AS rating_sum FROM Review WHERE reviewee_id = %s",
+                (user_id,)
+            )
+            stats_row = cursor.fetchone()
+            review_count, rating_sum = stats_row['review_count'], stats_row['rating_sum']
+        review_count = int(review_count or 0)
+        rating_sum = int(rating_sum or 0)
+        review_stats = {
+            "count": review_count,
+            "average_rating": round(rating_sum / review_count, 2) if review_count else None
+        }
+
+        # Base64로 변환 (상세 화면용 썸네일), ?photo=url 이면 사진 URL
+        attach_photo(profile_row, 'detail', as_url=wants_photo_url(data))
+
+        # 리뷰 조회 (최신순, review_id 기준 커서 페이지네이션)
+        reviews = []
+        next_review_before = None
+        if review_limit and review_count:
+            query_reviews = """
+                SELECT 
+                    R.review_id,
+                    R.content,
+                    R.rating,
+                    R.created_at
+                FROM Review AS R
+                WHERE R.reviewee_id = %s
+            """
+            params = [user_id]
+            if review_before is not None:
+                query_reviews += " AND R.review_id < %s"
+                params.append(review_before)
+            query_reviews += " ORDER BY R.review_id DESC LIMIT %s"
+            params.append(review_limit)
+            cursor.execute(query_reviews, params)
+            reviews = cursor.fetchall()
+            if len(reviews) == review_limit:
+                next_review_before = reviews[-1]['review_id']
 
         return jsonify({
             "success": True,
             "profile": profile_row,
-            "reviews": reviews
+            "review_stats": review_stats,
+            "reviews": reviews,
+            "next_review_before": next_review_before
         }), 200
 
     except Exception as e:
@@ -422,6 +1691,278 @@ def get_profile_detail():
             connection.close()
 
 
+##################################
+# 프로필 필드 선택 (projection)
+##################################
+# 응답 필드 -> SELECT 컬럼 (P = UserProfile, U = User)
+PROFILE_COLUMNS = {
+    'user_id': 'P.user_id',
+    'username': 'U.username',
+    'name': 'U.name',
+    'profile_id': 'P.profile_id',
+    'age': 'P.age',
+    'phone': 'P.phone',
+    'photo_url': 'P.photo_url',
+    'is_smoking': 'P.is_smoking',
+    'snoring': 'P.snoring',
+    'introduction': 'P.introduction',
+    'wishes': 'P.wishes',
+    'preferred_region': 'P.preferred_region',
+    'budget': 'P.budget',
+    'created_at': 'P.created_at',
+    'updated_at': 'P.updated_at',
+}
+# UserProfile만 조회하는 API(/all_users, /recommend_roommates)에서 쓸 수 있는 필드
+USER_PROFILE_COLUMNS = {field: column for field, column in PROFILE_COLUMNS.items() if column.startswith('P.')}
+PHOTO_FIELD = 'photo'  # photo_base64 / photo_image_url (photo_url 컬럼 필요)
+
+
+def parse_fields(raw_fields, columns, default):
+    """
+    fields 파라미터(목록 또는 쉼표로 구분한 문자열) 검증
+    - 없으면 default, 알 수 없는 필드가 있으면 ValueError
+    - user_id는 항상 포함
+    """
+    if raw_fields is None:
+        return list(default)
+    if isinstance(raw_fields, str):
+        raw_fields = raw_fields.split(',')
+    fields = [str(field).strip() for field in raw_fields if str(field).strip()]
+    unknown = [field for field in fields if field not in columns and field != PHOTO_FIELD]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+    if 'user_id' not in fields:
+        fields.insert(0, 'user_id')
+    return list(dict.fromkeys(fields))
+
+
+def requested_fields(data=None, args=None):
+    """?fields= 또는 JSON의 "fields" 값 (없으면 None)"""
+    if data and data.get('fields') is not None:
+        return data['fields']
+    return (request.args if args is None else args).get('fields')
+
+
+def select_list(fields, columns):
+    """필드 목록 -> SELECT 절 (사진을 요청하면 photo_url 컬럼도 함께 조회)"""
+    selected = [field for field in fields if field in columns]
+    if PHOTO_FIELD in fields and 'photo_url' not in selected:
+        selected.append('photo_url')
+    return ",\n                ".join(f"{columns[field]} AS {field}" for field in selected)
+
+
+def apply_photo_field(row, fields, variant, as_url):
+    """사진을 요청했으면 attach_photo, photo_url은 직접 요청한 경우에만 남김"""
+    if PHOTO_FIELD in fields:
+        attach_photo(row, variant, as_url=as_url)
+        if 'photo_url' not in fields:
+            row.pop('photo_url', None)
+
+
+##################################
+# 여러 유저 프로필 한 번에 조회
+##################################
+PROFILES_BATCH_MAX = int(os.getenv("PROFILES_BATCH_MAX", 200))
+
+
+def build_profiles_query(data):
+    """
+    /profiles 요청 JSON -> (query, user_ids, fields)
+    - user_ids는 중복 제거 (순서 유지), 잘못된 값이면 ValueError
+    """
+    user_ids = data.get('user_ids')
+    if not isinstance(user_ids, list) or not user_ids:
+        raise ValueError("user_ids는 user_id 목록이어야 합니다.")
+    if len(user_ids) > PROFILES_BATCH_MAX:
+        raise ValueError(f"user_ids는 최대 {PROFILES_BATCH_MAX}개까지 가능합니다.")
+    try:
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+    except (TypeError, ValueError):
+        raise ValueError("user_ids는 정수 목록이어야 합니다.")
+    fields = parse_fields(data.get('fields'), PROFILE_COLUMNS, list(PROFILE_COLUMNS) + [PHOTO_FIELD])
+
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    query = f"""
+        SELECT
+            {select_list(fields, PROFILE_COLUMNS)}
+        FROM UserProfile AS P
+        JOIN User AS U
+          ON P.user_id = U.user_id
+        WHERE P.user_id IN ({placeholders})
+    """
+    return query, user_ids, fields
+
+
+def order_profiles(rows, user_ids):
+    """조회 결과를 user_ids 순서로 -> (profiles, not_found)"""
+    by_id = {row['user_id']: row for row in rows}
+    profiles = [by_id[user_id] for user_id in user_ids if user_id in by_id]
+    return profiles, [user_id for user_id in user_ids if user_id not in by_id]
+
+
+@app.route('/profiles', methods=['POST'])
+def get_profiles():
+    """
+    - JSON: { "user_ids": [1, 2, 3], "fields": ["name", "age", "photo"] }
+    - 여러 유저의 프로필을 쿼리 하나(WHERE user_id IN (...))로 반환 (팔로잉 목록 화면 등)
+    - fields: 반환할 필드 (PROFILE_COLUMNS + "photo"), 생략하면 전체
+    - 사진은 목록용 썸네일, ?photo=url 또는 "photo": "url" 이면 사진 URL
+    - 응답 순서는 user_ids 순서, 프로필이 없는 id는 not_found
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"success": False, "message": "No JSON data provided"}), 400
+
+        try:
+            query, user_ids, fields = build_profiles_query(data)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        connection = db_pool.connect(cursorclass=pymysql.cursors.DictCursor)
+        cursor = connection.cursor()
+        cursor.execute(query, user_ids)
+        profiles, not_found = order_profiles(cursor.fetchall(), user_ids)
+
+        as_url = wants_photo_url(data)
+        for profile in profiles:
+            apply_photo_field(profile, fields, 'list', as_url)
+
+        return jsonify({
+            "success": True,
+            "profiles": profiles,
+            "not_found": not_found
+        }), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
+##################################
+# 팔로우 그래프 메모리 인덱스
+##################################
+FOLLOW_GRAPH_TTL = float(os.getenv("FOLLOW_GRAPH_TTL", 60))  # Follow 테이블과 다시 맞추는 주기(초), 다른 워커의 변경 반영용
+
+
+class FollowGraph:
+    """
+    Follow 테이블의 인접 리스트 (유저별 following / follower 집합)
+    - 팔로잉 목록, 팔로우 여부, 맞팔 여부를 DB 없이 O(1)로 확인
+    - 처음 사용할 때 DB에서 로드, /follow, /unfollow가 커밋 후 즉시 반영
+    - FOLLOW_GRAPH_TTL마다 백그라운드에서 DB 전체를 다시 읽어 교체
+      (다시 읽는 동안 이 워커에서 생긴 변경은 기록해 두었다가 교체 후 다시 적용)
+    - 다른 워커의 변경은 최대 FOLLOW_GRAPH_TTL 늦게 보이므로 조회용으로만 사용
+      (/follow 중복 여부, /review 맞팔 여부처럼 쓰기를 허용하는 판단은 DB로 확인)
+    """
+
+    def __init__(self, ttl=FOLLOW_GRAPH_TTL):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # dict를 순서 있는 집합으로 사용 (팔로우한 순서 유지)
+        self._following = defaultdict(dict)  # follower_id -> {following_id: None}
+        self._followers = defaultdict(dict)  # following_id -> {follower_id: None}
+        self._loaded_at = None
+        self._refreshing = False
+        self._pending = None  # 다시 읽는 중이면 그동안의 변경 목록
+
+    def load(self):
+        """Follow 테이블 전체에서 그래프를 다시 만듦"""
+        requested = time.monotonic()
+        with self._load_lock:
+            if self._loaded_at is not None and self._loaded_at >= requested:
+                return  # 기다리는 동안 다른 스레드가 이미 다시 읽음
+            with self._lock:
+                self._pending = []
+            try:
+                connection = db_pool.connect()
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute("SELECT follower_id, following_id FROM Follow ORDER BY follow_id")
+                    rows = cursor.fetchall()
+                finally:
+                    connection.close()
+
+                following = defaultdict(dict)
+                followers = defaultdict(dict)
+                for follower_id, following_id in rows:
+                    following[follower_id][following_id] = None
+                    followers[following_id][follower_id] = None
+
+                with self._lock:
+                    self._following, self._followers = following, followers
+                    for op, follower_id, following_id in self._pending:
+                        self._apply(op, follower_id, following_id)
+                    self._loaded_at = time.monotonic()
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            self.load()
+        elif time.monotonic() - self._loaded_at > self._ttl:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.load()
+        except Exception:
+            pass  # 실패하면 기존 그래프 유지, 다음 요청에서 다시 시도
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _apply(self, op, follower_id, following_id):
+        if op == 'add':
+            self._following[follower_id][following_id] = None
+            self._followers[following_id][follower_id] = None
+        else:
+            self._following.get(follower_id, {}).pop(following_id, None)
+            self._followers.get(following_id, {}).pop(follower_id, None)
+
+    def _record(self, op, follower_id, following_id):
+        with self._lock:
+            self._apply(op, follower_id, following_id)
+            if self._pending is not None:
+                self._pending.append((op, follower_id, following_id))
+
+    def add(self, follower_id, following_id):
+        """팔로우 커밋 후 호출"""
+        self._record('add', int(follower_id), int(following_id))
+
+    def remove(self, follower_id, following_id):
+        """언팔로우 커밋 후 호출"""
+        self._record('remove', int(follower_id), int(following_id))
+
+    def following_ids(self, follower_id):
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._following.get(int(follower_id), ()))
+
+    def follower_ids(self, following_id):
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._followers.get(int(following_id), ()))
+
+    def is_following(self, follower_id, following_id):
+        self._ensure_loaded()
+        return int(following_id) in self._following.get(int(follower_id), ())
+
+    def is_mutual(self, user_a, user_b):
+        return self.is_following(user_a, user_b) and self.is_following(user_b, user_a)
+
+
+follow_graph = FollowGraph()
+
+
 ##################################
 # 5) 팔로우 요청
 ##################################
@@ -430,11 +1971,10 @@ def follow_user():
     """
     - JSON: { "follower_id": 1, "following_id": 2 }
     - follower_id가 following_id를 팔로우
+    - 이미 팔로우 중인지는 DB에서 판단 (INSERT ... WHERE NOT EXISTS의 rowcount)
+      follow_graph는 다른 워커의 언팔로우가 FOLLOW_GRAPH_TTL 동안 반영되지 않을 수 있어서 확인에 쓰지 않음
     """
     try:
-        connection = pymysql.connect(**db_config)
-        cursor = connection.cursor()
-
         data = request.get_json()
         if not data:
             return jsonify({"success": False, "message": "No JSON data provided"}), 400
@@ -447,23 +1987,24 @@ def follow_user():
         if follower_id == following_id:
             return jsonify({"success": False, "message": "자신을 팔로우할 수 없습니다."}), 400
 
-        # 이미 팔로우 상태인지 확인
-        check_sql = """
-            SELECT follow_id FROM Follow
-            WHERE follower_id = %s AND following_id = %s
-        """
-        cursor.execute(check_sql, (follower_id, following_id))
-        existing = cursor.fetchone()
-        if existing:
-            return jsonify({"success": False, "message": "이미 팔로우 상태입니다."}), 400
+        connection = db_pool.connect()
+        cursor = connection.cursor()
 
-        # 팔로우 추가
+        # 팔로우 추가 (없을 때만, 확인과 추가를 쿼리 하나로)
         insert_sql = """
             INSERT INTO Follow (follower_id, following_id)
-            VALUES (%s, %s)
+            SELECT %s, %s FROM DUAL
+            WHERE NOT EXISTS (
+                SELECT 1 FROM Follow WHERE follower_id = %s AND following_id = %s
+            )
         """
-        cursor.execute(insert_sql, (follower_id, following_id))
+        cursor.execute(insert_sql, (follower_id, following_id, follower_id, following_id))
         connection.commit()
+        follow_graph.add(follower_id, following_id)
+
+        if cursor.rowcount == 0:
+            # 이미 팔로우 중 (다른 워커에서 팔로우했으면 위의 add로 메모리 인덱스도 맞춰짐)
+            return jsonify({"success": False, "message": "이미 팔로우 상태입니다."}), 400
 
         return jsonify({"success": True, "message": "팔로우 완료"}), 201
 
@@ -484,7 +2025,7 @@ def unfollow_user():
     - follower_id가 following_id를 언팔로우
     """
     try:
-        connection = pymysql.connect(**db_config)
+        connection = db_pool.connect()
         cursor = connection.cursor()
 
         data = request.get_json()
@@ -506,6 +2047,7 @@ def unfollow_user():
         """
         cursor.execute(delete_sql, (follower_id, following_id))
         connection.commit()
+        follow_graph.remove(follower_id, following_id)
 
         return jsonify({"success": True, "message": "언팔로우 완료"}), 200
 
@@ -527,7 +2069,7 @@ def create_review():
     - 조건: 서로 팔로우 관계인지 확인 후 INSERT
     """
     try:
-        connection = pymysql.connect(**db_config)
+        connection = db_pool.connect()
         cursor = connection.cursor()
 
         data = request.get_json()
@@ -547,6 +2089,7 @@ def create_review():
             return jsonify({"success": False, "message": "자신에게 리뷰를 작성할 수 없습니다."}), 400
 
         # 팔로우 관계 확인 (서로 맞팔 상태 확인)
+        # 리뷰 작성 권한이므로 항상 DB로 확인 (follow_graph는 다른 워커의 언팔로우가 늦게 반영될 수 있음)
         check_follow_sql = """
             SELECT 1 FROM Follow f1
             JOIN Follow f2
@@ -565,7 +2108,19 @@ def create_review():
             VALUES (%s, %s, %s, %s)
         """
         cursor.execute(insert_sql, (reviewer_id, reviewee_id, rating, content))
+
+        # 리뷰 집계 갱신 (리뷰 추가와 같은 트랜잭션)
+        stats_sql = """
+            INSERT INTO UserReviewStats (user_id, review_count, rating_sum)
+            VALUES (%s, 1, %s)
+            ON DUPLICATE KEY UPDATE
+                review_count = review_count + 1,
+                rating_sum = rating_sum + VALUES(rating_sum)
+        """
+        cursor.execute(stats_sql, (reviewee_id, int(rating)))
         connection.commit()
+        # 커밋된 리뷰가 /reviews 피드에 바로 보이도록 캐시 무효화
+        review_feed_cache.invalidate()
 
         return jsonify({"success": True, "message": "리뷰 작성 완료"}), 201
 
@@ -578,13 +2133,91 @@ def create_review():
 ##################################
 # 8) 상단 6개 리뷰 반환
 ##################################
-@app.route('/reviews', methods=['GET'])
-def get_top_reviews():
+REVIEW_FEED_SIZE = 6
+REVIEW_FEED_TTL = float(os.getenv("REVIEW_FEED_TTL", 30))   # 공유 캐시가 없을 때 다른 워커의 리뷰 작성이 보이기까지 최대 시간(초)
+REVIEW_CACHE_REDIS_URL = os.getenv("REVIEW_CACHE_REDIS_URL")  # 설정하면 워커 간 무효화를 Redis 버전 키로 공유
+
+
+class ReviewFeedCache:
     """
-    - 최신 리뷰 상위 6개 반환
+    /reviews 최신 리뷰 피드 캐시
+    - 직렬화된 응답 본문과 ETag를 함께 저장 (적중 시 DB 조회와 JSON 변환 모두 생략)
+    - /review 작성 커밋 후 invalidate()
+    - REVIEW_CACHE_REDIS_URL이 있으면 Redis의 버전 번호로 다른 워커의 무효화도 즉시 반영,
+      없으면 이 워커의 무효화 + REVIEW_FEED_TTL
     """
+
+    VERSION_KEY = 'review_feed:version'
+
+    def __init__(self, ttl=REVIEW_FEED_TTL, redis_url=REVIEW_CACHE_REDIS_URL):
+        self._ttl = ttl
+        self._redis_url = redis_url
+        self._redis = None
+        self._lock = threading.Lock()
+        self._entry = None  # (본문 bytes, etag, 저장 시각, 버전)
+        self._generation = 0  # invalidate()마다 증가, 읽는 도중 무효화된 결과는 저장하지 않음
+
+    def _shared(self):
+        if self._redis_url and self._redis is None:
+            import redis  # 공유 캐시를 쓸 때만 필요
+
+            self._redis = redis.Redis.from_url(self._redis_url)
+        return self._redis
+
+    def _shared_version(self):
+        shared = self._shared()
+        if shared is None:
+            return None
+        try:
+            return int(shared.get(self.VERSION_KEY) or 0)
+        except Exception:
+            return None  # Redis 장애 시 TTL 기준으로 동작
+
+    def _is_fresh(self, entry, version):
+        if entry is None:
+            return False
+        if version is not None:
+            return entry[3] == version
+        return time.monotonic() - entry[2] < self._ttl
+
+    def get(self, loader):
+        """(본문, etag) 반환, 캐시가 없거나 무효화됐으면 loader()로 피드를 다시 읽음"""
+        version = self._shared_version()
+        entry = self._entry
+        if self._is_fresh(entry, version):
+            return entry[0], entry[1]
+
+        with self._lock:
+            # 다른 스레드가 먼저 다시 읽었을 수 있음
+            entry = self._entry
+            if self._is_fresh(entry, version):
+                return entry[0], entry[1]
+            generation = self._generation
+            body = app.json.response({"success": True, "reviews": loader()}).get_data()
+            etag = hashlib.sha1(body).hexdigest()
+            if generation == self._generation:
+                self._entry = (body, etag, time.monotonic(), version)
+            return body, etag
+
+    def invalidate(self):
+        # get()과 같은 잠금 안에서 바꿈 (읽는 중인 스레드가 무효화 전 피드를 저장하지 않도록)
+        with self._lock:
+            self._generation += 1
+            self._entry = None
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.incr(self.VERSION_KEY)
+            except Exception:
+                pass
+
+
+review_feed_cache = ReviewFeedCache()
+
+
+def load_top_reviews():
+    connection = db_pool.connect()
     try:
-        connection = pymysql.connect(**db_config)
         cursor = connection.cursor(pymysql.cursors.DictCursor)
 
         # 최신 리뷰 상위 6개를 가져오는 쿼리
@@ -602,24 +2235,231 @@ def get_top_reviews():
             JOIN User AS reviewer ON R.reviewer_id = reviewer.user_id
             JOIN User AS reviewee ON R.reviewee_id = reviewee.user_id
             ORDER BY R.created_at DESC
-            LIMIT 6
+            LIMIT %s
         """
-        cursor.execute(query)
-        reviews = cursor.fetchall()  # 최신 리뷰 상위 6개
+        cursor.execute(query, (REVIEW_FEED_SIZE,))
+        return cursor.fetchall()  # 최신 리뷰 상위 6개
+    finally:
+        connection.close()
 
-        return jsonify({
-            "success": True,
-            "reviews": reviews
-        }), 200
+
+@app.route('/reviews', methods=['GET'])
+def get_top_reviews():
+    """
+    - 최신 리뷰 상위 6개 반환
+    - review_feed_cache에서 반환, ETag가 같으면(If-None-Match) 304
+    """
+    try:
+        body, etag = review_feed_cache.get(load_top_reviews)
+
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # 클라이언트는 저장하되 매번 ETag로 재검증
+        return response.make_conditional(request)
 
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
-    finally:
-        if 'connection' in locals():
-            connection.close()
+
+##################################
+# 주소 좌표 캐시 + 공간 인덱스
+##################################
+GEO_INDEX_TTL = float(os.getenv("GEO_INDEX_TTL", 600))        # AddressInfo/UserProfile과 다시 맞추는 주기(초)
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", 0.01))  # 격자 한 칸 크기 (위도 0.01도 ≈ 1.1km)
+NEARBY_MAX_RADIUS_M = 20000
+NEARBY_MAX_LIMIT = 200
+COORDINATES_BATCH_MAX = int(os.getenv("COORDINATES_BATCH_MAX", 1000))  # /get-coordinates/batch 최대 주소 수
+COORDINATES_BATCH_CHUNK = 500  # IN (...) 한 번에 넣는 주소 수
+EARTH_RADIUS_M = 6371000
+
+
+def normalize_address(address):
+    """
+    주소 비교용 키
+    - 유니코드 정규화(NFKC), 소문자, 공백/쉼표/마침표/괄호 제거
+    - '서울특별시' -> '서울', '부산광역시' -> '부산' 처럼 시 단위 접미사 통일
+    """
+    key = unicodedata.normalize('NFKC', address).lower()
+    key = ''.join(ch for ch in key if not ch.isspace() and ch not in ',.()')
+    for suffix in ('특별자치시', '특별자치도', '특별시', '광역시'):
+        key = key.replace(suffix, '')
+    return key
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """두 좌표 사이 거리(미터)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class GeoIndex:
+    """
+    AddressInfo 전체를 메모리에 올린 좌표 조회 테이블 + 격자(grid) 공간 인덱스
+    - lookup(): 원문 주소, 없으면 normalize_address() 키로 조회
+    - nearby(): 반경 안의 주소와, 선호 지역(preferred_region)이 그 주소인 유저를 거리순으로
+    - 처음 사용할 때 로드, GEO_INDEX_TTL마다 백그라운드에서 다시 로드
+    - 인덱스에 없어서 DB에서 찾은 주소는 add()로 바로 추가
+    """
+
+    def __init__(self, ttl=GEO_INDEX_TTL, cell_degrees=GEO_CELL_DEGREES):
+        self._ttl = ttl
+        self._cell = cell_degrees
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        self._refreshing = False
+        self._by_address = {}     # 원문 주소 -> (주소, latitude, longitude)
+        self._by_key = {}         # 정규화 키 -> (주소, latitude, longitude)
+        self._grid = {}           # (격자 행, 격자 열) -> [(주소, lat, lon), ...]
+        self._region_users = {}   # 정규화 키 -> {user_id: preferred_region}
+        self._user_regions = {}   # user_id -> 정규화 키
+
+    def _cell_of(self, lat, lon):
+        return int(math.floor(lat / self._cell)), int(math.floor(lon / self._cell))
+
+    def load(self):
+        """AddressInfo, UserProfile.preferred_region에서 인덱스를 다시 만듦"""
+        requested = time.monotonic()
+        with self._load_lock:
+            if self._loaded_at is not None and self._loaded_at >= requested:
+                return  # 기다리는 동안 다른 스레드가 이미 다시 읽음
+            connection = db_pool.connect()
+            try:
+                cursor = connection.cursor()
+                cursor.execute("SELECT address, latitude, longitude FROM AddressInfo")
+                addresses = cursor.fetchall()
+                cursor.execute("SELECT user_id, preferred_region FROM UserProfile")
+                regions = cursor.fetchall()
+            finally:
+                connection.close()
+
+            by_address, by_key, grid = {}, {}, defaultdict(list)
+            for address, latitude, longitude in addresses:
+                if address is None or latitude is None or longitude is None:
+                    continue
+                entry = (address, latitude, longitude)
+                by_address[address] = entry
+                by_key.setdefault(normalize_address(address), entry)
+                grid[self._cell_of(float(latitude), float(longitude))].append(entry)
+
+            region_users, user_regions = defaultdict(dict), {}
+            for user_id, preferred_region in regions:
+                if preferred_region:
+                    key = normalize_address(preferred_region)
+                    region_users[key][user_id] = preferred_region
+                    user_regions[user_id] = key
+
+            with self._lock:
+                self._by_address, self._by_key, self._grid = by_address, by_key, dict(grid)
+                self._region_users, self._user_regions = region_users, user_regions
+                self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            self.load()
+        elif time.monotonic() - self._loaded_at > self._ttl:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.load()
+        except Exception:
+            pass  # 실패하면 기존 인덱스 유지
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def set_user_region(self, user_id, preferred_region):
+        """/profile 저장 후 호출 (유저의 선호 지역 변경 반영)"""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            user_id = int(user_id)
+            old_key = self._user_regions.pop(user_id, None)
+            if old_key is not None:
+                self._region_users.get(old_key, {}).pop(user_id, None)
+            if preferred_region:
+                key = normalize_address(preferred_region)
+                self._region_users.setdefault(key, {})[user_id] = preferred_region
+                self._user_regions[user_id] = key
+
+    def add(self, address, latitude, longitude):
+        """마지막 로드 이후 추가된 주소를 인덱스에 반영"""
+        if latitude is None or longitude is None:
+            return
+        entry = (address, latitude, longitude)
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            if address in self._by_address:
+                return
+            self._by_address[address] = entry
+            self._by_key.setdefault(normalize_address(address), entry)
+            self._grid.setdefault(self._cell_of(float(latitude), float(longitude)), []).append(entry)
+
+    def lookup(self, address):
+        """(주소, latitude, longitude) 또는 None"""
+        self._ensure_loaded()
+        entry = self._by_address.get(address)
+        if entry is None:
+            entry = self._by_key.get(normalize_address(address))
+        return entry
+
+    def nearby(self, latitude, longitude, radius_m, limit):
+        """
+        반경 radius_m 안의 주소 목록과 유저 목록 (가까운 순, 각각 최대 limit개)
+        - 주소: [{address, latitude, longitude, distance_m}]
+        - 유저: [{user_id, preferred_region, address, distance_m}]
+        """
+        self._ensure_loaded()
+        lat_span = radius_m / 111320
+        lon_span = radius_m / (111320 * max(math.cos(math.radians(latitude)), 1e-6))
+        min_row, min_col = self._cell_of(latitude - lat_span, longitude - lon_span)
+        max_row, max_col = self._cell_of(latitude + lat_span, longitude + lon_span)
+
+        with self._lock:
+            grid, region_users = self._grid, self._region_users
+            found = []
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    for address, lat, lon in grid.get((row, col), ()):
+                        distance = haversine_m(latitude, longitude, float(lat), float(lon))
+                        if distance <= radius_m:
+                            found.append((distance, address, lat, lon))
+            found.sort(key=lambda item: item[0])
+
+            addresses = [
+                {"address": address, "latitude": lat, "longitude": lon, "distance_m": round(distance, 1)}
+                for distance, address, lat, lon in found[:limit]
+            ]
+            users = []
+            for distance, address, _, _ in found:
+                for user_id, preferred_region in region_users.get(normalize_address(address), {}).items():
+                    users.append({"user_id": user_id, "preferred_region": preferred_region,
+                                  "address": address, "distance_m": round(distance, 1)})
+                    if len(users) >= limit:
+                        break
+                if len(users) >= limit:
+                    break
+        return addresses, users
+
+
+geo_index = GeoIndex()
+
 
 @app.route('/get-coordinates', methods=['POST'])
 def get_coordinates():
+    """
+    - JSON: { "address": "서울특별시 강남구 ..." }
+    - 주소의 위도/경도 반환 (geo_index에서 조회, 띄어쓰기/표기 차이는 정규화해서 비교)
+    - geo_index에 없으면 DB에서 조회 (마지막 로드 이후 추가된 주소 대비), 찾으면 인덱스에 추가
+    """
     try:
         # 요청 데이터에서 주소 추출
         data = request.get_json()
@@ -628,25 +2468,19 @@ def get_coordinates():
         if not address:
             return jsonify({'error': '주소를 제공해주세요.'}), 400
 
-        # MySQL 데이터베이스 연결
-        connection = pymysql.connect(**db_config)
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-            # 주소로 위도와 경도 조회
-        query = """
-                SELECT latitude, longitude
-                FROM AddressInfo
-                WHERE address = %s
-            """
-        cursor.execute(query, (address,))
-        result = cursor.fetchone()
-
-        connection.close()
+        # 주소로 위도와 경도 조회
+        result = geo_index.lookup(address)
+        if result is None:
+            found = fetch_coordinates([address]).get(address)
+            if found is not None:
+                geo_index.add(address, *found)
+                result = (address, *found)
 
         if result:
             return jsonify({
                 'address': address,
-                'latitude': result['latitude'],
-                'longitude': result['longitude']
+                'latitude': result[1],
+                'longitude': result[2]
             }), 200
         else:
             return jsonify({'error': '주소를 찾을 수 없습니다.'}), 404
@@ -654,51 +2488,271 @@ def get_coordinates():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+def fetch_coordinates(addresses):
+    """
+    DB에서 주소 목록의 좌표 조회 (WHERE address IN (...), COORDINATES_BATCH_CHUNK개씩)
+    - 반환값: {주소: (latitude, longitude)}
+    """
+    found = {}
+    if not addresses:
+        return found
+    connection = db_pool.connect()
+    try:
+        cursor = connection.cursor()
+        for i in range(0, len(addresses), COORDINATES_BATCH_CHUNK):
+            chunk = addresses[i:i + COORDINATES_BATCH_CHUNK]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(
+                f"SELECT address, latitude, longitude FROM AddressInfo WHERE address IN ({placeholders})",
+                chunk,
+            )
+            for address, latitude, longitude in cursor.fetchall():
+                found[address] = (latitude, longitude)
+    finally:
+        connection.close()
+    return found
+
+
+@app.route('/get-coordinates/batch', methods=['POST'])
+def get_coordinates_batch():
+    """
+    - JSON: { "addresses": ["서울특별시 강남구 ...", "..."] }
+    - 여러 주소의 위도/경도를 한 번에 반환
+    - geo_index에서 먼저 찾고, 없는 주소만 DB에서 한 번에(IN) 조회 (마지막 로드 이후 추가된 주소 대비)
+    - 응답: { "coordinates": { 주소: {latitude, longitude} 또는 null }, "not_found": [주소, ...] }
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"success": False, "message": "No JSON data provided"}), 400
+
+        addresses = data.get('addresses')
+        if not isinstance(addresses, list) or not addresses:
+            return jsonify({"success": False, "message": "addresses는 주소 목록이어야 합니다."}), 400
+        if len(addresses) > COORDINATES_BATCH_MAX:
+            return jsonify({"success": False, "message": f"주소는 최대 {COORDINATES_BATCH_MAX}개까지 가능합니다."}), 400
+
+        # 중복 제거 (순서 유지)
+        addresses = list(dict.fromkeys(str(address) for address in addresses if address))
+
+        coordinates = {}
+        missing = []
+        for address in addresses:
+            entry = geo_index.lookup(address)
+            if entry:
+                coordinates[address] = {"latitude": entry[1], "longitude": entry[2]}
+            else:
+                missing.append(address)
+
+        for address, (latitude, longitude) in fetch_coordinates(missing).items():
+            geo_index.add(address, latitude, longitude)
+            coordinates[address] = {"latitude": latitude, "longitude": longitude}
+
+        not_found = [address for address in addresses if address not in coordinates]
+        for address in not_found:
+            coordinates[address] = None
+
+        return jsonify({
+            "success": True,
+            "coordinates": coordinates,
+            "not_found": not_found
+        }), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@app.route('/nearby', methods=['POST'])
+def get_nearby():
+    """
+    - JSON: { "latitude": 37.5, "longitude": 127.0, "radius_m": 1000, "limit": 50 }
+    - 반경 안의 주소, 그리고 선호 지역이 그 주소들인 유저를 가까운 순으로 반환
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"success": False, "message": "No JSON data provided"}), 400
+
+        try:
+            latitude = float(data['latitude'])
+            longitude = float(data['longitude'])
+            radius_m = float(data.get('radius_m', 1000))
+            limit = int(data.get('limit', 50))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"success": False, "message": "latitude, longitude는 필수이며 숫자여야 합니다."}), 400
+
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return jsonify({"success": False, "message": "좌표 범위가 올바르지 않습니다."}), 400
+        if not (0 < radius_m <= NEARBY_MAX_RADIUS_M):
+            return jsonify({"success": False, "message": f"radius_m은 0~{NEARBY_MAX_RADIUS_M} 사이의 값이어야 합니다."}), 400
+        if not (1 <= limit <= NEARBY_MAX_LIMIT):
+            return jsonify({"success": False, "message": f"limit은 1~{NEARBY_MAX_LIMIT} 사이의 값이어야 합니다."}), 400
+
+        addresses, users = geo_index.nearby(latitude, longitude, radius_m, limit)
+
+        return jsonify({
+            "success": True,
+            "addresses": addresses,
+            "users": users
+        }), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+##################################
+# 목록 API 공통: 커서 기반 페이지네이션 + 스트리밍 응답
+##################################
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+STREAM_CHUNK_ROWS = 100  # 스트리밍 시 한 번에 내보낼 행 수
+
+
+def parse_page_args(args=None):
+    """
+    ?limit=&after= 파싱 (after = 이전 페이지의 마지막 user_id)
+    - limit이 없으면 None (기존처럼 전체 반환)
+    - 잘못된 값이면 ValueError
+    """
+    args = request.args if args is None else args
+    limit = args.get('limit')
+    after = args.get('after')
+    if limit is not None:
+        limit = int(limit)
+        if not (1 <= limit <= MAX_PAGE_SIZE):
+            raise ValueError(f"limit은 1~{MAX_PAGE_SIZE} 사이의 값이어야 합니다.")
+    if after is not None:
+        after = int(after)
+    return limit, after
+
+
+def build_page_query(select_sql, limit, after):
+    """user_id 기준 keyset 페이지네이션 조건을 붙인 (query, params)"""
+    params = []
+    if after is not None:
+        select_sql += " WHERE user_id > %s"
+        params.append(after)
+    if limit is not None or after is not None:
+        select_sql += " ORDER BY user_id"
+    if limit is not None:
+        select_sql += " LIMIT %s"
+        params.append(limit)
+    return select_sql, params
+
+
+def next_cursor(rows, limit):
+    """다음 페이지 요청에 쓸 after 값 (마지막 페이지면 None)"""
+    if limit is not None and len(rows) == limit:
+        return rows[-1]['user_id']
+    return None
+
+
+def stream_rows_response(query, params, key, limit=None, transform=None):
+    """
+    서버 측 커서(SSDictCursor)로 읽은 행을 {"success": true, key: [...]} JSON으로 바로 내보냄
+    - 전체 결과를 메모리에 올리지 않음
+    - 쿼리 실행까지는 여기서 처리하므로 DB 오류는 스트리밍 시작 전에 예외로 전달
+    - 연결은 응답이 닫힐 때(call_on_close) 반납 -> HEAD 요청이나 본문을 읽기 전에 끊긴 경우에도 반납됨
+    """
+    connection = db_pool.connect(cursorclass=pymysql.cursors.SSDictCursor)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+    except Exception:
+        connection.close()
+        raise
+
+    def release():
+        # 남은 결과를 정리하고 연결 반납 (여러 번 불려도 한 번만 반납됨)
+        try:
+            cursor.close()
+        finally:
+            connection.close()
+
+    def generate():
+        try:
+            yield f'{{"success": true, "{key}": ['
+            count = 0
+            last_user_id = None
+            chunk = []
+            for row in cursor:
+                if transform:
+                    transform(row)
+                chunk.append(app.json.dumps(row))
+                count += 1
+                last_user_id = row['user_id']
+                if len(chunk) >= STREAM_CHUNK_ROWS:
+                    yield (',' if count > len(chunk) else '') + ','.join(chunk)
+                    chunk = []
+            if chunk:
+                yield (',' if count > len(chunk) else '') + ','.join(chunk)
+            yield ']'
+            if limit is not None:
+                after = last_user_id if count == limit else None
+                yield f', "next_after": {app.json.dumps(after)}'
+            yield '}'
+        finally:
+            # 클라이언트가 중간에 끊어도 남은 결과를 정리하고 연결 반납
+            release()
+
+    response = Response(stream_with_context(generate()), mimetype='application/json')
+    response.call_on_close(release)
+    return response
+
+
+# /all_users 기본 필드 (profile_id 제외, 사진 포함)
+ALL_USERS_DEFAULT_FIELDS = [field for field in USER_PROFILE_COLUMNS if field != 'profile_id'] + [PHOTO_FIELD]
+
+
 @app.route('/all_users', methods=['GET'])
 def get_all_users():
+    """
+    UserProfile 목록 반환
+    - ?limit=&after= : user_id 기준 커서 페이지네이션 (응답에 next_after 포함)
+    - ?stream=1 : 서버 측 커서로 읽으면서 JSON을 스트리밍
+    - ?fields=user_id,age,preferred_region,budget : 필요한 컬럼만 SELECT, "photo"가 없으면 사진은 읽지 않음
+    """
     try:
+        try:
+            limit, after = parse_page_args()
+            fields = parse_fields(requested_fields(), USER_PROFILE_COLUMNS, ALL_USERS_DEFAULT_FIELDS)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        # 쿼리 실행 (요청한 필드만)
+        query, params = build_page_query(f"""
+            SELECT 
+                {select_list(fields, USER_PROFILE_COLUMNS)}
+            FROM UserProfile AS P
+        """, limit, after)
+
+        # photo_url 값을 Base64로 변환 (목록용 작은 썸네일), ?photo=url 이면 사진 URL
+        as_url = wants_photo_url()
+
+        def transform(user):
+            apply_photo_field(user, fields, 'list', as_url)
+
+        if request.args.get('stream') == '1':
+            return stream_rows_response(query, params, 'users', limit, transform=transform)
+
         # 데이터베이스 연결 (DictCursor 설정)
-        connection = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+        connection = db_pool.connect(cursorclass=pymysql.cursors.DictCursor)
         cursor = connection.cursor()
 
-        # 쿼리 실행 (profile_id 제외)
-        query = """
-            SELECT 
-                user_id,
-                age,
-                phone,
-                photo_url,
-                is_smoking,
-                snoring,
-                introduction,
-                wishes,
-                preferred_region,
-                budget,
-                created_at,
-                updated_at
-            FROM UserProfile;
-        """
-        cursor.execute(query)
+        cursor.execute(query, params)
         users = cursor.fetchall()  # DictCursor로 딕셔너리 형식으로 결과 반환
 
-        # photo_url 값을 Base64로 변환
         for user in users:
-            photo_path = user.get('photo_url')  # DB에서 가져온 photo_url
-            if photo_path and os.path.exists(photo_path):
-                try:
-                    with open(photo_path, 'rb') as img_file:
-                        # Base64 인코딩
-                        user['photo_base64'] = base64.b64encode(img_file.read()).decode('utf-8')
-                except Exception as e:
-                    user['photo_base64'] = None  # 에러 발생 시 None으로 처리
-            else:
-                user['photo_base64'] = None  # 경로가 없거나 파일이 없는 경우
+            transform(user)
 
-        # JSON 응답 반환
-        return jsonify({
+        response = {
             "success": True,
             "users": users  # Base64로 변환된 데이터를 포함한 결과 반환
-        }), 200
+        }
+        if limit is not None:
+            response["next_after"] = next_cursor(users, limit)
+
+        # JSON 응답 반환
+        return jsonify(response), 200
 
     except Exception as e:
         # 예외 처리
@@ -716,27 +2770,42 @@ def get_all_users():
 def user_name():
     """
     User 테이블에서 user_id와 name만 반환하는 엔드포인트
+    - ?limit=&after= : user_id 기준 커서 페이지네이션 (응답에 next_after 포함)
+    - ?stream=1 : 서버 측 커서로 읽으면서 JSON을 스트리밍
     """
     try:
-        # 데이터베이스 연결
-        connection = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
-        cursor = connection.cursor()
+        try:
+            limit, after = parse_page_args()
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
 
         # 쿼리 실행 (user_id와 name만 선택)
-        query = """
+        query, params = build_page_query("""
             SELECT 
                 user_id,
                 name
-            FROM User;
-        """
-        cursor.execute(query)
+            FROM User
+        """, limit, after)
+
+        if request.args.get('stream') == '1':
+            return stream_rows_response(query, params, 'users', limit)
+
+        # 데이터베이스 연결
+        connection = db_pool.connect(cursorclass=pymysql.cursors.DictCursor)
+        cursor = connection.cursor()
+
+        cursor.execute(query, params)
         users = cursor.fetchall()  # DictCursor로 딕셔너리 형식으로 결과 가져오기
 
-        # JSON 응답 반환
-        return jsonify({
+        response = {
             "success": True,
             "users": users
-        }), 200
+        }
+        if limit is not None:
+            response["next_after"] = next_cursor(users, limit)
+
+        # JSON 응답 반환
+        return jsonify(response), 200
 
     except Exception as e:
         # 예외 처리
@@ -750,6 +2819,182 @@ def user_name():
         if 'connection' in locals():
             connection.close()
 
+##################################
+# 조건 검색 (지역, 예산, 나이, 흡연, 코골이)
+##################################
+# 정렬 가능한 필드 -> 컬럼 (user_id로 동순위 정렬)
+SEARCH_SORT_COLUMNS = {
+    'user_id': 'P.user_id',
+    'budget': 'P.budget',
+    'age': 'P.age',
+    'updated_at': 'P.updated_at',
+}
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_DEFAULT_FIELDS = ['user_id', 'age', 'preferred_region', 'budget', 'is_smoking', 'snoring', PHOTO_FIELD]
+
+
+def encode_search_cursor(sort_value, user_id):
+    """다음 페이지 커서 (정렬 값, user_id) -> URL에 넣을 수 있는 문자열"""
+    payload = json.dumps([sort_value, user_id], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_search_cursor(cursor):
+    """encode_search_cursor의 반대, 잘못된 값이면 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, user_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return sort_value, int(user_id)
+    except Exception:
+        raise ValueError("after 커서가 올바르지 않습니다.")
+
+
+def parse_search_filters(args):
+    """
+    검색 조건 -> (WHERE 조건 목록, 파라미터)
+    - region: preferred_region 일치
+    - budget_min / budget_max, age_min / age_max: 범위 (양 끝 포함)
+    - is_smoking, snoring: 0 또는 1
+    - 잘못된 값이면 ValueError
+    """
+    conditions, params = [], []
+
+    region = args.get('region')
+    if region:
+        conditions.append("P.preferred_region = %s")
+        params.append(region)
+
+    for field in ('budget', 'age'):
+        low, high = args.get(f'{field}_min'), args.get(f'{field}_max')
+        try:
+            low = int(low) if low not in (None, '') else None
+            high = int(high) if high not in (None, '') else None
+        except (TypeError, ValueError):
+            raise ValueError(f"{field}_min, {field}_max는 정수여야 합니다.")
+        if low is not None and high is not None and low > high:
+            raise ValueError(f"{field}_min은 {field}_max보다 클 수 없습니다.")
+        if low is not None:
+            conditions.append(f"P.{field} >= %s")
+            params.append(low)
+        if high is not None:
+            conditions.append(f"P.{field} <= %s")
+            params.append(high)
+
+    for field in ('is_smoking', 'snoring'):
+        value = args.get(field)
+        if value in (None, ''):
+            continue
+        if str(value).lower() in ('1', 'true'):
+            value = 1
+        elif str(value).lower() in ('0', 'false'):
+            value = 0
+        else:
+            raise ValueError(f"{field}는 0 또는 1이어야 합니다.")
+        conditions.append(f"P.{field} = %s")
+        params.append(value)
+
+    return conditions, params
+
+
+def build_search_query(args):
+    """
+    /search_profiles 쿼리 파라미터 -> (query, params, fields, sort, limit)
+    - 잘못된 값이면 ValueError
+    """
+    sort = args.get('sort', 'user_id')
+    order = args.get('order', 'asc').lower()
+    if sort not in SEARCH_SORT_COLUMNS:
+        raise ValueError(f"sort는 {', '.join(SEARCH_SORT_COLUMNS)} 중 하나여야 합니다.")
+    if order not in ('asc', 'desc'):
+        raise ValueError("order는 asc 또는 desc여야 합니다.")
+    limit = int(args.get('limit', SEARCH_DEFAULT_LIMIT))
+    if not (1 <= limit <= MAX_PAGE_SIZE):
+        raise ValueError(f"limit은 1~{MAX_PAGE_SIZE} 사이의 값이어야 합니다.")
+    fields = parse_fields(args.get('fields'), USER_PROFILE_COLUMNS, SEARCH_DEFAULT_FIELDS)
+    conditions, params = parse_search_filters(args)
+    after = decode_search_cursor(args['after']) if args.get('after') else None
+
+    sort_column = SEARCH_SORT_COLUMNS[sort]
+    compare = '>' if order == 'asc' else '<'
+    if sort == 'user_id':
+        if after is not None:
+            conditions.append(f"P.user_id {compare} %s")
+            params.append(after[1])
+        order_by = f"P.user_id {order.upper()}"
+    else:
+        conditions.append(f"{sort_column} IS NOT NULL")
+        if after is not None:
+            conditions.append(f"({sort_column} {compare} %s OR ({sort_column} = %s AND P.user_id {compare} %s))")
+            params.extend([after[0], after[0], after[1]])
+        order_by = f"{sort_column} {order.upper()}, P.user_id {order.upper()}"
+
+    # 커서를 만들려면 정렬 컬럼이 필요 (요청하지 않았으면 search_next_after에서 제거)
+    selected = fields if sort in fields else fields + [sort]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT
+            {select_list(selected, USER_PROFILE_COLUMNS)}
+        FROM UserProfile AS P
+        {where}
+        ORDER BY {order_by}
+        LIMIT %s
+    """
+    params.append(limit)
+    return query, params, fields, sort, limit
+
+
+def search_next_after(users, fields, sort, limit):
+    """다음 페이지 커서 (마지막 페이지면 None), 요청하지 않은 정렬 컬럼은 users에서 제거"""
+    next_after = None
+    if len(users) == limit:
+        last = users[-1]
+        next_after = encode_search_cursor(last[sort], last['user_id'])
+    if sort not in fields:
+        for user in users:
+            user.pop(sort, None)
+    return next_after
+
+
+@app.route('/search_profiles', methods=['GET'])
+def search_profiles():
+    """
+    조건에 맞는 프로필 검색 (필터링은 MySQL에서 인덱스로 처리)
+    - ?region=&budget_min=&budget_max=&age_min=&age_max=&is_smoking=&snoring=
+    - ?sort=user_id|budget|age|updated_at (기본 user_id), ?order=asc|desc (기본 asc)
+      user_id 이외로 정렬하면 그 값이 NULL인 프로필은 제외
+    - ?limit= (기본 50, 최대 MAX_PAGE_SIZE), ?after= : 이전 응답의 next_after (keyset 페이지네이션)
+    - ?fields= : 반환할 필드 (기본 user_id, age, preferred_region, budget, is_smoking, snoring, photo)
+    - 인덱스: migrations/002_user_profile_search_indexes.sql
+    """
+    try:
+        try:
+            query, params, fields, sort, limit = build_search_query(request.args)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        connection = db_pool.connect(cursorclass=pymysql.cursors.DictCursor)
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        users = cursor.fetchall()
+
+        next_after = search_next_after(users, fields, sort, limit)
+        as_url = wants_photo_url()
+        for user in users:
+            apply_photo_field(user, fields, 'list', as_url)
+
+        return jsonify({
+            "success": True,
+            "users": users,
+            "next_after": next_after
+        }), 200
+
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+
 @app.route('/following', methods=['POST'])
 def get_following():
     """
@@ -765,21 +3010,8 @@ def get_following():
         if not follower_id:
             return jsonify({"success": False, "message": "follower_id is required"}), 400
 
-        # 데이터베이스 연결
-        connection = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
-        cursor = connection.cursor()
-
-        # 쿼리 실행 (follower_id가 following하고 있는 모든 following_id 조회)
-        query = """
-            SELECT following_id 
-            FROM Follow
-            WHERE follower_id = %s;
-        """
-        cursor.execute(query, (follower_id,))
-        results = cursor.fetchall()  # 결과 가져오기
-
-        # following_id 리스트로 변환
-        following_ids = [row['following_id'] for row in results]
+        # follower_id가 following하고 있는 모든 following_id (메모리 인덱스)
+        following_ids = follow_graph.following_ids(follower_id)
 
         # JSON 응답 반환
         return jsonify({
@@ -792,68 +3024,601 @@ def get_following():
         # 예외 처리
         return jsonify({"success": False, "message": str(e)}), 500
 
-    finally:
-        # 연결 닫기
-        if 'connection' in locals():
+##################################
+# 룸메이트 추천용 메모리 인덱스
+##################################
+RECOMMEND_FEATURES = ['age', 'is_smoking', 'snoring', 'budget']
+RECOMMEND_INDEX_TTL = float(os.getenv("RECOMMEND_INDEX_TTL", 300))  # DB와 다시 맞추는 주기(초), 다른 워커의 저장 반영용
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RoommateIndex:
+    """
+    UserProfile의 추천용 수치 컬럼(age, is_smoking, snoring, budget)을 NumPy 행렬로 메모리에 유지
+    - 각 행은 미리 L2 정규화 -> 코사인 유사도 = 행렬 x 벡터 한 번
+    - 상위 k개는 argpartition으로 선택 (전체 정렬 없음)
+    - /profile 저장 시 upsert로 즉시 반영, RECOMMEND_INDEX_TTL마다 백그라운드에서 DB 전체와 재동기화
+      (다시 읽는 동안의 upsert는 기록해 두었다가 교체 후 다시 적용)
+    - 인덱스에 없는 유저(다른 워커에서 방금 저장)는 그 한 명만 DB에서 읽어 반영
+    """
+
+    def __init__(self, ttl=RECOMMEND_INDEX_TTL):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        self._refreshing = False
+        self._pending = None  # 다시 읽는 중이면 그동안의 upsert 목록
+        self._ids = None     # load() 전에는 numpy를 import하지 않음
+        self._matrix = None
+        self._count = 0
+        self._positions = {}  # user_id -> 행 번호
+
+    @staticmethod
+    def _normalize(vectors):
+        import numpy as np
+
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0  # 0 벡터는 유사도 0 (sklearn cosine_similarity와 동일)
+        return vectors / norms
+
+    def load(self):
+        """UserProfile 전체에서 인덱스를 다시 만듦"""
+        import numpy as np
+
+        requested = time.monotonic()
+        with self._load_lock:
+            if self._loaded_at is not None and self._loaded_at >= requested:
+                return  # 기다리는 동안 다른 스레드가 이미 다시 읽음
+            with self._lock:
+                self._pending = []
+            try:
+                connection = db_pool.connect()
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute("SELECT user_id, age, is_smoking, snoring, budget FROM UserProfile")
+                    rows = cursor.fetchall()
+                finally:
+                    connection.close()
+
+                ids = np.array([row[0] for row in rows], dtype=np.int64)
+                matrix = np.array([[_to_float(v) for v in row[1:]] for row in rows], dtype=np.float64)
+                matrix = self._normalize(matrix.reshape(len(rows), len(RECOMMEND_FEATURES)))
+                with self._lock:
+                    self._ids = ids
+                    self._matrix = matrix
+                    self._count = len(rows)
+                    self._positions = {int(user_id): i for i, user_id in enumerate(ids)}
+                    for user_id, vector in self._pending:
+                        self._apply(user_id, vector)
+                    self._loaded_at = time.monotonic()
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            self.load()
+        elif time.monotonic() - self._loaded_at > self._ttl:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.load()
+        except Exception:
+            pass  # 실패하면 기존 인덱스 유지, 다음 요청에서 다시 시도
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def upsert(self, user_id, age, is_smoking, snoring, budget):
+        """프로필 한 건의 수치 컬럼을 인덱스에 반영"""
+        import numpy as np
+
+        vector = self._normalize(np.array([_to_float(age), _to_float(is_smoking),
+                                           _to_float(snoring), _to_float(budget)]))
+        user_id = int(user_id)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((user_id, vector))
+            if self._loaded_at is None:
+                return  # 아직 로드 전이면 첫 조회 때 DB에서 읽어옴
+            self._apply(user_id, vector)
+
+    def _apply(self, user_id, vector):
+        import numpy as np
+
+        position = self._positions.get(user_id)
+        if position is None:
+            if self._count == len(self._ids):
+                # 용량을 두 배로 늘려 추가 비용을 상각
+                capacity = max(16, 2 * len(self._ids))
+                ids = np.empty(capacity, dtype=np.int64)
+                matrix = np.zeros((capacity, len(RECOMMEND_FEATURES)), dtype=np.float64)
+                ids[:self._count] = self._ids[:self._count]
+                matrix[:self._count] = self._matrix[:self._count]
+                self._ids, self._matrix = ids, matrix
+            position = self._count
+            self._count += 1
+            self._positions[user_id] = position
+            self._ids[position] = user_id
+        self._matrix[position] = vector
+
+    def _load_one(self, user_id):
+        """인덱스에 없는 유저 한 명만 DB에서 읽어 반영 (프로필이 없으면 False)"""
+        connection = db_pool.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT age, is_smoking, snoring, budget FROM UserProfile WHERE user_id = %s", (user_id,)
+            )
+            row = cursor.fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return False
+        self.upsert(user_id, *row)
+        return True
+
+    def scores(self, user_id):
+        """
+        user_id와 모든 유저의 코사인 유사도 -> (user_id 배열, 유사도 배열), 본인은 -inf
+        - 프로필이 없으면 None
+        """
+        import numpy as np
+
+        user_id = int(user_id)
+        self._ensure_loaded()
+        with self._lock:
+            missing = user_id not in self._positions
+        if missing and not self._load_one(user_id):
+            return None
+
+        with self._lock:
+            position = self._positions.get(user_id)
+            if position is None:
+                return None
+            matrix = self._matrix[:self._count]
+            scores = matrix @ matrix[position]
+            scores[position] = -np.inf  # 본인 제외
+            return self._ids[:self._count].copy(), scores
+
+    def top_k(self, user_id, k=5):
+        """
+        user_id와 코사인 유사도가 높은 k명의 (user_id, similarity) 목록
+        - 프로필이 없으면 None
+        """
+        result = self.scores(user_id)
+        if result is None:
+            return None
+        ids, scores = result
+        return [(int(ids[i]), float(scores[i])) for i in top_k_indices(scores, k)]
+
+
+def top_k_indices(scores, k):
+    """scores에서 값이 큰 순으로 k개의 위치 (-inf는 제외, 전체 정렬 없이 argpartition)"""
+    import numpy as np
+
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+roommate_index = RoommateIndex()
+
+
+##################################
+# 룸메이트 추천용 텍스트 인덱스 (자기소개, 원하는 점, 선호 지역)
+##################################
+TEXT_NGRAM_SIZES = (2, 3)                                            # 글자 n-gram 길이 (한국어는 형태소 분석 없이 글자 단위)
+TEXT_MAX_CHARS = int(os.getenv("TEXT_MAX_CHARS", 1000))              # 필드당 인덱싱할 최대 글자 수
+TEXT_REGION_WEIGHT = float(os.getenv("TEXT_REGION_WEIGHT", 2.0))     # 선호 지역 n-gram 가중치 (자기소개/원하는 점 대비)
+TEXT_MATCH_WEIGHT = float(os.getenv("TEXT_MATCH_WEIGHT", 0.5))       # blend 모드에서 텍스트 유사도 비중 (0~1)
+TEXT_INDEX_TTL = float(os.getenv("TEXT_INDEX_TTL", 600))             # DB 전체로 다시 만드는 주기(초), IDF 갱신 + 다른 워커의 저장 반영
+REGION_TERM_PREFIX = '@'  # 선호 지역 n-gram은 자기소개 n-gram과 다른 단어로 취급
+
+
+def char_ngrams(text, sizes=TEXT_NGRAM_SIZES):
+    """NFKC 정규화 + 소문자 + 공백 정리 후 글자 n-gram 목록"""
+    if not text:
+        return []
+    text = " ".join(unicodedata.normalize('NFKC', str(text)[:TEXT_MAX_CHARS]).lower().split())
+    grams = []
+    for n in sizes:
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def profile_terms(introduction, wishes, preferred_region):
+    """프로필 텍스트 -> {단어(n-gram): 출현 횟수}"""
+    counts = defaultdict(int)
+    for gram in char_ngrams(introduction) + char_ngrams(wishes):
+        counts[gram] += 1
+    for gram in char_ngrams(preferred_region):
+        counts[REGION_TERM_PREFIX + gram] += 1
+    return counts
+
+
+class TextIndex:
+    """
+    UserProfile의 introduction, wishes, preferred_region 글자 n-gram TF-IDF 인덱스
+    - 문서 벡터: (1 + log tf) * idf, L2 정규화 -> 두 벡터의 내적 = 코사인 유사도
+    - 전체 문서는 CSR 형태의 희소 행렬(data, indices, indptr)로 미리 계산, 요청마다 다시 벡터화하지 않음
+      한 유저와 전체의 유사도 = data * q[indices]를 행별로 합산 (np.bincount) 한 번
+    - /profile 저장 시 upsert로 그 유저의 벡터만 다시 계산해 행렬 끝에 새 행으로 추가 (기존 행은 stale 표시)
+      배열은 용량을 두 배씩 늘려 추가 비용을 상각, 조회는 추가된 행까지 포함해 bincount 한 번
+      df는 바로 갱신하지만 다른 문서의 idf 가중치는 TEXT_INDEX_TTL마다 전체를 다시 만들 때 반영 (stale 행도 이때 정리)
+    - 처음에는 동기 로드, 이후 재구축은 백그라운드 (다시 만드는 동안의 upsert는 기록했다가 다시 적용)
+    """
+
+    def __init__(self, ttl=TEXT_INDEX_TTL):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        self._refreshing = False
+        self._pending = None     # 재구축 중이면 그동안의 upsert 목록
+        self._vocab = {}         # 단어 -> 열 번호
+        self._df = None          # 열 번호 -> 문서 수 (numpy, 용량을 두 배씩 늘림)
+        self._boost = None       # 열 번호 -> 가중치 (선호 지역 n-gram은 TEXT_REGION_WEIGHT)
+        self._doc_count = 0
+        # 희소 행렬 (앞의 _row_count행, _nnz개 값만 유효, 나머지는 여유 용량)
+        self._ids = None         # 행 번호 -> user_id
+        self._rows = None        # 값마다 행 번호 (bincount용)
+        self._indices = None     # 값마다 열 번호
+        self._data = None        # 정규화된 가중치
+        self._indptr = None      # 행 i의 값 = [indptr[i], indptr[i + 1])
+        self._positions = {}     # user_id -> 최신 행 번호
+        self._stale = None       # upsert로 뒤에 새 행이 추가된 행
+        self._row_count = 0
+        self._nnz = 0
+
+    def _term_ids(self, counts):
+        """단어 -> 열 번호 (처음 보는 단어는 새 열), {열 번호: 출현 횟수}"""
+        import numpy as np
+
+        term_counts = {}
+        for term, count in counts.items():
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                term_id = self._vocab[term] = len(self._vocab)
+                if term_id >= len(self._df):
+                    capacity = max(1024, 2 * len(self._df))
+                    self._df = np.concatenate([self._df, np.zeros(capacity - len(self._df), dtype=np.int64)])
+                    self._boost = np.concatenate([self._boost, np.ones(capacity - len(self._boost))])
+                self._boost[term_id] = TEXT_REGION_WEIGHT if term.startswith(REGION_TERM_PREFIX) else 1.0
+            term_counts[term_id] = count
+        return term_counts
+
+    def _weigh(self, term_counts):
+        """{열 번호: 출현 횟수} -> (열 번호 배열, L2 정규화된 TF-IDF 가중치 배열)"""
+        import numpy as np
+
+        ids = np.fromiter(term_counts.keys(), dtype=np.int64, count=len(term_counts))
+        tf = np.fromiter(term_counts.values(), dtype=np.float64, count=len(term_counts))
+        idf = np.log((1 + self._doc_count) / (1 + self._df[ids])) + 1  # sklearn smooth_idf와 같은 식
+        weights = (1 + np.log(tf)) * idf * self._boost[ids]
+        norm = np.linalg.norm(weights)
+        if norm == 0:
+            return ids[:0], weights[:0]
+        return ids, (weights / norm).astype(np.float32)
+
+    def load(self):
+        """UserProfile 전체에서 인덱스를 다시 만듦"""
+        import numpy as np
+
+        requested = time.monotonic()
+        with self._load_lock:
+            if self._loaded_at is not None and self._loaded_at >= requested:
+                return  # 기다리는 동안 다른 스레드가 이미 다시 읽음
+            with self._lock:
+                self._pending = []
+            try:
+                connection = db_pool.connect()
+                try:
+                    cursor = connection.cursor()
+                    cursor.execute("SELECT user_id, introduction, wishes, preferred_region FROM UserProfile")
+                    rows = cursor.fetchall()
+                finally:
+                    connection.close()
+
+                # 새 인덱스를 임시 객체에 만든 뒤 한 번에 교체
+                fresh = TextIndex(self._ttl)
+                fresh._df = np.zeros(1024, dtype=np.int64)
+                fresh._boost = np.ones(1024)
+                fresh._doc_count = len(rows)
+                docs = []
+                for user_id, introduction, wishes, preferred_region in rows:
+                    term_counts = fresh._term_ids(profile_terms(introduction, wishes, preferred_region))
+                    for term_id in term_counts:
+                        fresh._df[term_id] += 1
+                    docs.append((int(user_id), term_counts))
+
+                vectors = [fresh._weigh(term_counts) for _, term_counts in docs]
+                lengths = np.array([len(ids) for ids, _ in vectors], dtype=np.int64)
+                indptr = np.zeros(len(docs) + 1, dtype=np.int64)
+                np.cumsum(lengths, out=indptr[1:])
+                empty_ids, empty_weights = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+                with self._lock:
+                    self._vocab, self._df, self._boost = fresh._vocab, fresh._df, fresh._boost
+                    self._doc_count = fresh._doc_count
+                    self._ids = np.array([user_id for user_id, _ in docs], dtype=np.int64)
+                    self._rows = np.repeat(np.arange(len(docs)), lengths)
+                    self._indices = np.concatenate([ids for ids, _ in vectors] or [empty_ids])
+                    self._data = np.concatenate([weights for _, weights in vectors] or [empty_weights])
+                    self._indptr = indptr
+                    self._positions = {user_id: i for i, (user_id, _) in enumerate(docs)}
+                    self._stale = np.zeros(len(docs), dtype=bool)
+                    self._row_count = len(docs)
+                    self._nnz = int(indptr[-1])
+                    for user_id, introduction, wishes, preferred_region in self._pending:
+                        self._apply(user_id, introduction, wishes, preferred_region)
+                    self._loaded_at = time.monotonic()
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            self.load()
+        elif time.monotonic() - self._loaded_at > self._ttl:
+            with self._lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.load()
+        except Exception:
+            pass  # 실패하면 기존 인덱스 유지, 다음 요청에서 다시 시도
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _term_ids_of(self, user_id):
+        """현재 인덱스에 있는 user_id 문서의 열 번호 배열 (없으면 None)"""
+        position = self._positions.get(user_id)
+        if position is None:
+            return None
+        return self._indices[self._indptr[position]:self._indptr[position + 1]]
+
+    @staticmethod
+    def _reserve(array, size):
+        """array의 용량이 size 이상이 되도록 두 배씩 늘린 배열 (앞부분 유지)"""
+        import numpy as np
+
+        if size <= len(array):
+            return array
+        grown = np.zeros(max(size, 2 * len(array), 16), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _append_row(self, user_id, term_ids, weights):
+        """user_id의 새 벡터를 행렬 끝에 한 행으로 추가, 이전 행은 stale"""
+        row, start = self._row_count, self._nnz
+        end = start + len(term_ids)
+        self._ids = self._reserve(self._ids, row + 1)
+        self._stale = self._reserve(self._stale, row + 1)
+        self._indptr = self._reserve(self._indptr, row + 2)
+        self._rows = self._reserve(self._rows, end)
+        self._indices = self._reserve(self._indices, end)
+        self._data = self._reserve(self._data, end)
+
+        self._ids[row] = user_id
+        self._stale[row] = False
+        self._indptr[row + 1] = end
+        self._rows[start:end] = row
+        self._indices[start:end] = term_ids
+        self._data[start:end] = weights
+
+        previous = self._positions.get(user_id)
+        if previous is not None:
+            self._stale[previous] = True
+        self._positions[user_id] = row
+        self._row_count, self._nnz = row + 1, end
+
+    def _apply(self, user_id, introduction, wishes, preferred_region):
+        # 이전 문서의 df를 빼고 새 문서의 df를 더한 뒤 이 문서만 다시 벡터화
+        old_ids = self._term_ids_of(user_id)
+        if old_ids is not None:
+            self._df[old_ids] -= 1
+        else:
+            self._doc_count += 1
+        term_counts = self._term_ids(profile_terms(introduction, wishes, preferred_region))
+        for term_id in term_counts:
+            self._df[term_id] += 1
+        self._append_row(user_id, *self._weigh(term_counts))
+
+    def upsert(self, user_id, introduction, wishes, preferred_region):
+        """프로필 저장(커밋) 후 호출"""
+        user_id = int(user_id)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((user_id, introduction, wishes, preferred_region))
+            if self._loaded_at is None:
+                return  # 아직 로드 전이면 첫 조회 때 DB에서 읽어옴
+            self._apply(user_id, introduction, wishes, preferred_region)
+
+    def _load_one(self, user_id):
+        """인덱스에 없는 유저(다른 워커에서 방금 저장) 한 명만 DB에서 읽어 반영"""
+        connection = db_pool.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT introduction, wishes, preferred_region FROM UserProfile WHERE user_id = %s", (user_id,)
+            )
+            row = cursor.fetchone()
+        finally:
             connection.close()
+        if row is None:
+            return False
+        self.upsert(user_id, *row)
+        return True
+
+    def scores(self, user_id):
+        """
+        user_id와 모든 유저의 텍스트 코사인 유사도 -> (user_id 배열, 유사도 배열), 본인은 -inf
+        - 프로필이 없으면 None, 텍스트가 비어 있으면 모두 0
+        """
+        import numpy as np
+
+        user_id = int(user_id)
+        self._ensure_loaded()
+        with self._lock:
+            missing = self._term_ids_of(user_id) is None
+        if missing and not self._load_one(user_id):
+            return None
+
+        with self._lock:
+            position = self._positions.get(user_id)
+            if position is None:
+                return None
+            start, end = self._indptr[position], self._indptr[position + 1]
+
+            # 질의 벡터를 밀집 배열로 펼쳐서 희소 행렬(upsert로 추가된 행 포함)과 곱함
+            query = np.zeros(len(self._vocab), dtype=np.float32)
+            query[self._indices[start:end]] = self._data[start:end]
+            nnz, row_count = self._nnz, self._row_count
+            all_scores = np.bincount(self._rows[:nnz], weights=self._data[:nnz] * query[self._indices[:nnz]],
+                                     minlength=row_count)
+            live = ~self._stale[:row_count]
+            ids = self._ids[:row_count][live]
+
+        scores = all_scores[live]
+        scores[ids == user_id] = -np.inf  # 본인 제외
+        return ids, scores
+
+
+text_index = TextIndex()
+RECOMMEND_MODES = ('numeric', 'text', 'blend')
+
+
+def blended_top_k(user_id, k, text_weight):
+    """
+    수치 유사도(roommate_index)와 텍스트 유사도(text_index)를 섞은 상위 k명
+    - 점수 = (1 - text_weight) * 수치 유사도 + text_weight * 텍스트 유사도
+    - 반환값: [(user_id, 점수, 텍스트 유사도, 수치 유사도), ...], 프로필이 없으면 None
+    """
+    import numpy as np
+
+    numeric = roommate_index.scores(user_id)
+    if numeric is None:
+        return None
+    text = text_index.scores(user_id)
+    if text is None:
+        return None
+
+    numeric_ids, numeric_scores = numeric
+    text_ids, text_scores = text
+    # text_ids 순서의 점수를 numeric_ids 순서로 맞춤 (텍스트 인덱스에 없는 유저는 0)
+    order = np.argsort(text_ids, kind='stable')
+    sorted_ids = text_ids[order]
+    positions = np.clip(np.searchsorted(sorted_ids, numeric_ids), 0, max(len(sorted_ids) - 1, 0))
+    found = (sorted_ids[positions] == numeric_ids) if len(sorted_ids) else np.zeros(len(numeric_ids), dtype=bool)
+    aligned_text = np.where(found, text_scores[order][positions] if len(sorted_ids) else 0.0, 0.0)
+    aligned_text[~np.isfinite(aligned_text)] = 0.0
+
+    # 본인(-inf)은 그대로 제외 (text_weight=1일 때 0 * -inf = nan 방지)
+    excluded = ~np.isfinite(numeric_scores)
+    blended = (1 - text_weight) * np.where(excluded, 0.0, numeric_scores) + text_weight * aligned_text
+    blended[excluded] = -np.inf
+    return [
+        (int(numeric_ids[i]), float(blended[i]), float(aligned_text[i]), float(numeric_scores[i]))
+        for i in top_k_indices(blended, k)
+    ]
+
 
 @app.route('/recommend_roommates', methods=['POST'])
 def recommend_roommates():
     """
     user_id를 입력받아 유사한 프로필의 사용자 추천
+    - 유사도 계산은 메모리 인덱스(roommate_index)에서 처리, DB는 추천된 5명만 조회
+    - "fields": ["user_id", "age", "budget"] : 필요한 컬럼만 SELECT, "photo"가 없으면 사진은 읽지 않음
+      (similarity는 항상 포함)
+    - "mode": "numeric"(기본, age/is_smoking/snoring/budget) | "text"(자기소개/원하는 점/선호 지역) | "blend"
+      text, blend는 응답에 text_similarity, numeric_similarity도 포함
+    - "text_weight": blend 모드의 텍스트 비중 (0~1, 기본 TEXT_MATCH_WEIGHT)
     """
     try:
-        # 데이터베이스 연결
-        connection = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
-        cursor = connection.cursor()
-
         # 요청 JSON 데이터 가져오기
         data = request.get_json()
         user_id = data.get('user_id')
 
         if not user_id:
             return jsonify({"success": False, "message": "user_id is required"}), 400
-
-        # 대상 사용자 프로필 가져오기
-        query_user = "SELECT * FROM UserProfile WHERE user_id = %s"
-        cursor.execute(query_user, (user_id,))
-        user_profile = cursor.fetchone()
-
-        if not user_profile:
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "message": "user_id는 숫자여야 합니다."}), 400
+
+        try:
+            fields = parse_fields(requested_fields(data), USER_PROFILE_COLUMNS,
+                                  list(USER_PROFILE_COLUMNS) + [PHOTO_FIELD])
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
+        mode = data.get('mode', 'numeric')
+        if mode not in RECOMMEND_MODES:
+            return jsonify({"success": False, "message": f"mode는 {', '.join(RECOMMEND_MODES)} 중 하나여야 합니다."}), 400
+        try:
+            text_weight = 1.0 if mode == 'text' else float(data.get('text_weight', TEXT_MATCH_WEIGHT))
+        except (TypeError, ValueError):
+            text_weight = -1
+        if not (0 <= text_weight <= 1):
+            return jsonify({"success": False, "message": "text_weight는 0~1 사이의 값이어야 합니다."}), 400
+
+        # 유사도가 높은 순으로 상위 5명
+        if mode == 'numeric':
+            top = roommate_index.top_k(user_id, k=5)
+        else:
+            top = blended_top_k(user_id, 5, text_weight)
+        if top is None:
             return jsonify({"success": False, "message": "사용자 프로필을 찾을 수 없습니다."}), 404
 
-        # 모든 프로필 가져오기
-        query_all = "SELECT * FROM UserProfile WHERE user_id != %s"
-        cursor.execute(query_all, (user_id,))
-        all_profiles = cursor.fetchall()
-
-        # 데이터 준비 및 유사도 계산
-        user_df = pd.DataFrame([user_profile])
-        profiles_df = pd.DataFrame(all_profiles)
-
-        features = ['age', 'is_smoking', 'snoring', 'budget']
-        user_vector = user_df[features].values
-        profiles_vectors = profiles_df[features].values
-
-        # 코사인 유사도 계산
-        similarities = cosine_similarity(user_vector, profiles_vectors).flatten()
-        profiles_df['similarity'] = similarities
-
-        # 유사도가 높은 순으로 정렬
-        recommendations = profiles_df.sort_values(by='similarity', ascending=False).head(5).to_dict(orient='records')
-
-        # photo_url을 Base64로 변환
+        recommendations = []
+        if top:
+            # 데이터베이스 연결
+            connection = db_pool.connect(cursorclass=pymysql.cursors.DictCursor)
+            cursor = connection.cursor()
+
+            placeholders = ", ".join(["%s"] * len(top))
+            query = f"""
+                SELECT
+                    {select_list(fields, USER_PROFILE_COLUMNS)}
+                FROM UserProfile AS P
+                WHERE P.user_id IN ({placeholders})
+            """
+            cursor.execute(query, [entry[0] for entry in top])
+            profiles = {row['user_id']: row for row in cursor.fetchall()}
+
+            for entry in top:
+                profile = profiles.get(entry[0])
+                if profile is None:
+                    continue
+                profile['similarity'] = entry[1]
+                if mode != 'numeric':
+                    profile['text_similarity'], profile['numeric_similarity'] = entry[2], entry[3]
+                recommendations.append(profile)
+
+        # photo_url을 Base64로 변환 (추천 카드용 썸네일), ?photo=url 이면 사진 URL
+        as_url = wants_photo_url(data)
         for recommendation in recommendations:
-            photo_path = recommendation.get('photo_url')
-            if photo_path and os.path.exists(photo_path):
-                try:
-                    with open(photo_path, 'rb') as img_file:
-                        # Base64로 인코딩
-                        recommendation['photo_base64'] = base64.b64encode(img_file.read()).decode('utf-8')
-                except Exception as e:
-                    recommendation['photo_base64'] = None  # 에러 발생 시 None으로 설정
-            else:
-                recommendation['photo_base64'] = None  # 경로가 없거나 파일이 없는 경우
+            apply_photo_field(recommendation, fields, 'card', as_url)
 
         return jsonify({
             "success": True,
@@ -866,5 +3631,37 @@ def recommend_roommates():
     finally:
         if 'connection' in locals():
             connection.close()
+
+
+def preload():
+    """
+    워커 fork 전에 메모리 인덱스와 무거운 라이브러리를 미리 로드 (serve.py)
+    - fork 후 워커들이 copy-on-write로 공유 (워커마다 DB 전체를 다시 읽지 않음)
+    - 로드에 실패한 인덱스는 기존처럼 워커의 첫 요청 때 로드
+    - 반환값: {이름: 걸린 시간(초) 또는 오류 메시지}
+    """
+    results = {}
+    steps = [
+        ('follow_graph', follow_graph.load),
+        ('geo_index', geo_index.load),
+        ('roommate_index', roommate_index.load),
+        ('text_index', text_index.load),
+        ('libraries', lambda: (__import__('requests'), __import__('PIL.Image'))),
+    ]
+    for name, load in steps:
+        started = time.perf_counter()
+        try:
+            load()
+            results[name] = time.perf_counter() - started
+        except Exception as e:
+            results[name] = f"failed: {e}"
+    # 부모의 DB 소켓을 워커들이 물려받지 않도록 정리
+    db_pool.close_idle()
+    return results
+
+
+# app 모듈 import(라우트 등록까지)에 걸린 시간 (초)
+APP_IMPORT_SECONDS = time.perf_counter() - _import_started
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', debug=True, port=5002)
@@ -0,0 +1,579 @@
+"""
+ASGI(asyncio) 서빙 모드
+
+- 외부 API를 기다리는 라우트(/search, /search/batch, /trending_searches)와
+  읽기 전용 DB 라우트(/all_users, /user_name, /profiles, /search_profiles)를 이벤트 루프에서 처리
+  -> 네이버 API나 MySQL 응답을 기다리는 요청이 스레드를 차지하지 않음 (httpx, aiomysql)
+- 나머지 라우트(회원가입, 로그인, 프로필 저장, 팔로우, 리뷰, 사진 등)는 app.py의 Flask 앱을
+  그대로 마운트해서 스레드 풀에서 실행 (a2wsgi)
+- 요청/응답 형식은 app.py와 같음 (쿼리 생성, 검증, JSON 직렬화는 app.py 함수를 그대로 사용)
+- 비동기 라우트도 app.request_metrics에 기록되므로 /metrics에서 함께 보임
+
+실행:
+    pip install starlette uvicorn httpx aiomysql a2wsgi
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5002
+"""
+import asyncio
+import contextvars
+import os
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import quote
+
+import aiomysql
+import httpx
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+import app as sync_app
+from app import UpstreamError
+
+# ----- 비동기 모드 설정 -----
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 20))                # 이벤트 루프당 MySQL 연결 수
+ASYNC_UPSTREAM_CONNECTIONS = int(os.getenv("ASYNC_UPSTREAM_CONNECTIONS", 100))  # 네이버 API 동시 연결 수
+WSGI_THREADS = int(os.getenv("WSGI_THREADS", 10))                          # Flask 라우트를 실행할 스레드 수
+
+
+##################################
+# 요청 계측 (app.request_metrics에 기록)
+##################################
+_request_state = contextvars.ContextVar('request_state', default=None)
+
+
+@contextmanager
+def span(name):
+    """app.span의 비동기 버전: 현재 요청(task)의 name 구간 시간에 더함"""
+    state = _request_state.get()
+    if state is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        state['spans'][name] += time.perf_counter() - started
+
+
+def json_response(data, status_code=200):
+    """jsonify와 같은 형식(app.json 직렬화 + 줄바꿈)의 JSON 응답"""
+    with span('json'):
+        body = f"{sync_app.app.json.dumps(data)}\n"
+    return Response(body, status_code=status_code, media_type='application/json')
+
+
+routes = []
+
+
+def route(path, methods):
+    """비동기 라우트 등록 + 요청 시간/구간/DB 쿼리 수를 app.request_metrics에 기록"""
+    def decorator(handler):
+        async def endpoint(request):
+            state = {"spans": defaultdict(float), "db_queries": 0}
+            token = _request_state.set(state)
+            started = time.perf_counter()
+            try:
+                response = await handler(request)
+            finally:
+                _request_state.reset(token)
+            # 스트리밍 응답은 길이를 미리 알 수 없으므로 0으로 기록
+            response_bytes = len(getattr(response, 'body', b''))
+            sync_app.request_metrics.record(path, request.method, response.status_code,
+                                            time.perf_counter() - started, state['spans'],
+                                            state['db_queries'], response_bytes)
+            return response
+
+        routes.append(Route(path, endpoint, methods=methods))
+        return handler
+    return decorator
+
+
+async def read_json(request):
+    """요청 JSON (없거나 형식이 잘못되면 None)"""
+    try:
+        return await request.json()
+    except Exception:
+        return None
+
+
+##################################
+# 비동기 클라이언트 (MySQL, 네이버 API)
+##################################
+_db_pool = None
+_db_pool_lock = asyncio.Lock()
+_http_client = None
+
+
+async def get_db_pool():
+    """aiomysql 커넥션 풀, 처음 쓸 때 생성"""
+    global _db_pool
+    async with _db_pool_lock:
+        if _db_pool is None:
+            config = sync_app.db_config
+            _db_pool = await aiomysql.create_pool(
+                host=config["host"], user=config["user"], password=config["password"],
+                db=config["database"], port=config["port"],
+                minsize=1, maxsize=ASYNC_DB_POOL_SIZE,
+                pool_recycle=int(sync_app.DB_POOL_MAX_IDLE),
+                autocommit=True,  # 읽기 전용 라우트, 이전 요청의 스냅샷을 보지 않도록
+            )
+        return _db_pool
+
+
+async def fetch_all(query, params):
+    """query 실행 결과 전체 (dict 목록)"""
+    pool = await get_db_pool()
+    state = _request_state.get()
+    if state is not None:
+        state['db_queries'] += 1
+    async with pool.acquire() as connection:
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            with span('db'):
+                await cursor.execute(query, params)
+                return list(await cursor.fetchall())
+
+
+def get_http_client():
+    """keep-alive 연결을 재사용하는 네이버 API 클라이언트, 처음 쓸 때 생성"""
+    global _http_client
+    if _http_client is None:
+        connect_timeout, read_timeout = sync_app.NAVER_TIMEOUT
+        _http_client = httpx.AsyncClient(
+            headers={
+                "X-Naver-Client-Id": sync_app.CLIENT_ID,
+                "X-Naver-Client-Secret": sync_app.CLIENT_SECRET
+            },
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=ASYNC_UPSTREAM_CONNECTIONS,
+                                max_keepalive_connections=sync_app.NAVER_POOL_SIZE),
+        )
+    return _http_client
+
+
+@asynccontextmanager
+async def lifespan(_):
+    yield
+    # 종료 시 연결 정리
+    global _db_pool, _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _db_pool is not None:
+        _db_pool.close()
+        await _db_pool.wait_closed()
+        _db_pool = None
+
+
+##################################
+# 비동기 캐시
+##################################
+def _retrieve_exception(future):
+    # 기다리는 요청이 없을 때 "exception was never retrieved" 경고 방지
+    if not future.cancelled():
+        future.exception()
+
+
+class AsyncTTLCache:
+    """
+    app.TTLCache의 asyncio 버전 (키별 LRU + TTL)
+    - 같은 키를 동시에 요청하면 loader는 한 번만 실행하고 나머지는 같은 Future를 기다림
+    - 이벤트 루프 하나에서만 쓰므로 락이 필요 없음
+    """
+
+    def __init__(self, maxsize, ttl):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries = OrderedDict()  # key -> (저장 시각, 값)
+        self._inflight = {}
+
+    async def get_or_load(self, key, loader):
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self._ttl:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve_exception)
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            # 실패는 캐시하지 않고 기다리던 요청에도 같은 예외 전달
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+            raise
+        finally:
+            del self._inflight[key]
+
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+
+class AsyncRefreshingCache:
+    """
+    app.RefreshingCache의 asyncio 버전 (stale-while-revalidate)
+    - ttl ~ stale_ttl: 캐시 값을 바로 반환하고 갱신 task 하나만 실행
+    - 값이 없거나 stale_ttl 초과: 갱신 task 하나를 모든 요청이 함께 기다림
+    """
+
+    def __init__(self, loader, ttl, stale_ttl):
+        self._loader = loader
+        self._ttl = ttl
+        self._stale_ttl = max(stale_ttl, ttl)
+        self._value = None
+        self._loaded_at = None
+        self._refresh = None  # 진행 중인 갱신 task
+
+    async def get(self):
+        age = None if self._loaded_at is None else time.monotonic() - self._loaded_at
+        if age is not None and age < self._ttl:
+            return self._value
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._load())
+            self._refresh.add_done_callback(_retrieve_exception)
+        if age is not None and age < self._stale_ttl:
+            return self._value
+        return await asyncio.shield(self._refresh)
+
+    async def _load(self):
+        try:
+            value = await self._loader()
+            self._value = value
+            self._loaded_at = time.monotonic()
+            return value
+        finally:
+            self._refresh = None
+
+
+##################################
+# 인기 검색어 / 네이버 뉴스 검색
+##################################
+async def fetch_trending_searches():
+    # pytrends는 동기 라이브러리 -> 갱신할 때만 스레드 하나 사용 (요청은 Future를 기다림)
+    with span('upstream'):
+        return await asyncio.to_thread(sync_app.fetch_trending_searches)
+
+
+trending_cache = AsyncRefreshingCache(fetch_trending_searches,
+                                      sync_app.TRENDING_CACHE_TTL, sync_app.TRENDING_STALE_TTL)
+news_cache = AsyncTTLCache(sync_app.NEWS_CACHE_SIZE, sync_app.NEWS_CACHE_TTL)
+# 프로세스 전체의 /search/batch 동시 upstream 요청 수 제한 (app.news_executor와 같은 역할)
+news_semaphore = asyncio.Semaphore(sync_app.NEWS_BATCH_CONCURRENCY)
+
+
+async def fetch_news(query, display, start, sort):
+    """app.fetch_news의 비동기 버전 (실패 시 UpstreamError)"""
+    params = {
+        "query": query,
+        "display": display,
+        "start": start,
+        "sort": sort
+    }
+
+    try:
+        with span('upstream'):
+            response = await get_http_client().get(sync_app.API_URL, params=params)
+    except httpx.TimeoutException:
+        raise UpstreamError(504)
+    except httpx.HTTPError:
+        raise UpstreamError(502)
+
+    if response.status_code != 200:
+        raise UpstreamError(response.status_code)
+
+    try:
+        data = response.json()
+        raw_items = [{"title": item["title"], "link": item["link"]} for item in data.get("items", [])]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise UpstreamError(502)
+    return sync_app.dedupe_by_title(raw_items)
+
+
+async def search_news_cached(query, display, start, sort):
+    key = (query, str(display), str(start), sort)
+    return await news_cache.get_or_load(key, lambda: fetch_news(query, display, start, sort))
+
+
+@route('/trending_searches', methods=['GET'])
+async def get_trending_searches(request):
+    try:
+        trending_searches = await trending_cache.get()
+        return json_response({
+            "success": True,
+            "trending_searches": trending_searches
+        })
+    except Exception as e:
+        return json_response({"success": False, "error": str(e)}, 500)
+
+
+@route('/search', methods=['GET'])
+async def search_news(request):
+    args = request.query_params
+    query = args.get('query', '집')
+    display = args.get('display', 10)
+    start = args.get('start', 1)
+    sort = args.get('sort', 'sim')
+
+    try:
+        unique_items = await search_news_cached(query, display, start, sort)
+    except UpstreamError as e:
+        return json_response({"error": str(e), "status_code": e.status_code}, e.status_code)
+
+    return json_response(unique_items)
+
+
+@route('/search/batch', methods=['POST'])
+async def search_news_batch(request):
+    data = await read_json(request)
+    if not data:
+        return json_response({"success": False, "message": "No JSON data provided"}, 400)
+
+    queries = data.get('queries')
+    if not isinstance(queries, list) or not queries:
+        return json_response({"success": False, "message": "queries는 검색어 목록이어야 합니다."}, 400)
+    if len(queries) > sync_app.NEWS_BATCH_MAX_QUERIES:
+        return json_response({"success": False,
+                              "message": f"검색어는 최대 {sync_app.NEWS_BATCH_MAX_QUERIES}개까지 가능합니다."}, 400)
+
+    display = data.get('display', 10)
+    start = data.get('start', 1)
+    sort = data.get('sort', 'sim')
+    dedupe_across = data.get('dedupe_across', False)
+    if not isinstance(dedupe_across, bool):
+        return json_response({"success": False, "message": "dedupe_across는 true 또는 false여야 합니다."}, 400)
+
+    async def search_one(query):
+        async with news_semaphore:
+            return await search_news_cached(str(query), display, start, sort)
+
+    outcomes = await asyncio.gather(*(search_one(query) for query in queries), return_exceptions=True)
+
+    results = []
+    seen_titles = set()
+    for query, items in zip(queries, outcomes):
+        if isinstance(items, UpstreamError):
+            results.append({"query": query, "error": str(items), "status_code": items.status_code})
+            continue
+        if isinstance(items, BaseException):
+            raise items
+        if dedupe_across:
+            items = sync_app.dedupe_by_title(items, seen_titles)
+        results.append({"query": query, "items": items})
+
+    return json_response({"success": True, "results": results})
+
+
+##################################
+# 읽기 전용 DB 라우트
+##################################
+def photo_base_url(request, as_url):
+    """사진 URL 앞부분 (http://host/photos/), as_url이 아니면 None"""
+    return f"{str(request.base_url).rstrip('/')}/photos/" if as_url else None
+
+
+def attach_photos(rows, fields, variant, base_url):
+    """
+    app.apply_photo_field와 같은 결과 (Flask url_for 대신 base_url로 사진 URL 생성)
+    - Base64는 파일을 읽으므로 스레드에서 호출 (await asyncio.to_thread(attach_photos, ...))
+    """
+    if sync_app.PHOTO_FIELD not in fields:
+        return rows
+    for row in rows:
+        photo_url = row.get('photo_url')
+        if base_url is not None:
+            row['photo_image_url'] = (f"{base_url}{quote(os.path.basename(photo_url))}?variant={variant}"
+                                      if photo_url else None)
+        else:
+            row['photo_base64'] = sync_app.load_photo_base64(photo_url, variant)
+        if 'photo_url' not in fields:
+            row.pop('photo_url', None)
+    return rows
+
+
+async def attach_photos_async(rows, fields, variant, base_url):
+    if sync_app.PHOTO_FIELD not in fields:
+        return rows
+    if base_url is not None:
+        return attach_photos(rows, fields, variant, base_url)
+    with span('file'):
+        return await asyncio.to_thread(attach_photos, rows, fields, variant, base_url)
+
+
+def stream_rows(query, params, key, limit=None, fields=(), base_url=None):
+    """
+    app.stream_rows_response의 비동기 버전 (서버 측 커서 SSDictCursor, 같은 JSON 형식)
+    - DB 오류는 스트리밍 도중에 나므로 응답이 잘린 JSON으로 끝날 수 있음
+    """
+    async def generate():
+        pool = await get_db_pool()
+        async with pool.acquire() as connection:
+            async with connection.cursor(aiomysql.SSDictCursor) as cursor:
+                await cursor.execute(query, params)
+                yield f'{{"success": true, "{key}": ['
+                count = 0
+                last_user_id = None
+                while True:
+                    rows = await cursor.fetchmany(sync_app.STREAM_CHUNK_ROWS)
+                    if not rows:
+                        break
+                    rows = await attach_photos_async(list(rows), fields, 'list', base_url)
+                    yield (',' if count else '') + ','.join(sync_app.app.json.dumps(row) for row in rows)
+                    count += len(rows)
+                    last_user_id = rows[-1]['user_id']
+                yield ']'
+                if limit is not None:
+                    after = last_user_id if count == limit else None
+                    yield f', "next_after": {sync_app.app.json.dumps(after)}'
+                yield '}'
+
+    return StreamingResponse(generate(), media_type='application/json')
+
+
+@route('/all_users', methods=['GET'])
+async def get_all_users(request):
+    args = request.query_params
+    try:
+        try:
+            limit, after = sync_app.parse_page_args(args)
+            fields = sync_app.parse_fields(sync_app.requested_fields(args=args),
+                                           sync_app.USER_PROFILE_COLUMNS, sync_app.ALL_USERS_DEFAULT_FIELDS)
+        except ValueError as e:
+            return json_response({"success": False, "message": str(e)}, 400)
+
+        query, params = sync_app.build_page_query(f"""
+            SELECT
+                {sync_app.select_list(fields, sync_app.USER_PROFILE_COLUMNS)}
+            FROM UserProfile AS P
+        """, limit, after)
+        base_url = photo_base_url(request, sync_app.wants_photo_url(args=args))
+
+        if args.get('stream') == '1':
+            return stream_rows(query, params, 'users', limit, fields, base_url)
+
+        users = await attach_photos_async(await fetch_all(query, params), fields, 'list', base_url)
+        response = {"success": True, "users": users}
+        if limit is not None:
+            response["next_after"] = sync_app.next_cursor(users, limit)
+        return json_response(response)
+
+    except Exception as e:
+        return json_response({"success": False, "message": str(e)}, 500)
+
+
+@route('/user_name', methods=['GET'])
+async def user_name(request):
+    args = request.query_params
+    try:
+        try:
+            limit, after = sync_app.parse_page_args(args)
+        except ValueError as e:
+            return json_response({"success": False, "message": str(e)}, 400)
+
+        query, params = sync_app.build_page_query("""
+            SELECT
+                user_id,
+                name
+            FROM User
+        """, limit, after)
+
+        if args.get('stream') == '1':
+            return stream_rows(query, params, 'users', limit)
+
+        users = await fetch_all(query, params)
+        response = {"success": True, "users": users}
+        if limit is not None:
+            response["next_after"] = sync_app.next_cursor(users, limit)
+        return json_response(response)
+
+    except Exception as e:
+        return json_response({"success": False, "message": str(e)}, 500)
+
+
+@route('/profiles', methods=['POST'])
+async def get_profiles(request):
+    try:
+        data = await read_json(request)
+        if not data:
+            return json_response({"success": False, "message": "No JSON data provided"}, 400)
+
+        try:
+            query, user_ids, fields = sync_app.build_profiles_query(data)
+        except ValueError as e:
+            return json_response({"success": False, "message": str(e)}, 400)
+
+        profiles, not_found = sync_app.order_profiles(await fetch_all(query, user_ids), user_ids)
+        base_url = photo_base_url(request, sync_app.wants_photo_url(data, args=request.query_params))
+        profiles = await attach_photos_async(profiles, fields, 'list', base_url)
+
+        return json_response({
+            "success": True,
+            "profiles": profiles,
+            "not_found": not_found
+        })
+
+    except Exception as e:
+        return json_response({"success": False, "message": str(e)}, 500)
+
+
+@route('/search_profiles', methods=['GET'])
+async def search_profiles(request):
+    args = request.query_params
+    try:
+        try:
+            query, params, fields, sort, limit = sync_app.build_search_query(args)
+        except ValueError as e:
+            return json_response({"success": False, "message": str(e)}, 400)
+
+        users = await fetch_all(query, params)
+        next_after = sync_app.search_next_after(users, fields, sort, limit)
+        base_url = photo_base_url(request, sync_app.wants_photo_url(args=args))
+        users = await attach_photos_async(users, fields, 'list', base_url)
+
+        return json_response({
+            "success": True,
+            "users": users,
+            "next_after": next_after
+        })
+
+    except Exception as e:
+        return json_response({"success": False, "message": str(e)}, 500)
+
+
+##################################
+# ASGI 앱: 비동기 라우트 + 나머지는 Flask
+##################################
+async_app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        # Flask 쪽 compress_response와 같은 기준 (Accept-Encoding: gzip, COMPRESS_MIN_BYTES 이상)
+        Middleware(GZipMiddleware, minimum_size=sync_app.COMPRESS_MIN_BYTES,
+                   compresslevel=sync_app.COMPRESS_GZIP_LEVEL),
+    ],
+    lifespan=lifespan,
+)
+wsgi_app = WSGIMiddleware(sync_app.app, workers=WSGI_THREADS)
+ASYNC_PATHS = {r.path for r in routes}
+
+
+async def app(scope, receive, send):
+    """비동기로 구현된 경로는 async_app, 그 밖의 경로는 Flask(wsgi_app)로 전달"""
+    if scope['type'] == 'lifespan' or scope.get('path') in ASYNC_PATHS:
+        await async_app(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
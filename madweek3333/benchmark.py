@@ -0,0 +1,576 @@
+"""
+app.py 라우트별 부하 테스트 / 마이크로 벤치마크
+
+- MySQL 대신 SQLite 파일 DB를 pymysql 연결처럼 감싸서 사용 (app.py의 SQL을 그대로 실행)
+- User, UserProfile, Follow, Review, AddressInfo 행과 프로필 사진 파일을 원하는 개수만큼 생성
+- 네이버 검색 API, Google Trends는 지연 시간을 흉내 내는 가짜 객체로 대체
+- 데이터 크기별로 새 프로세스에서 실행 (캐시/인덱스/RSS가 서로 섞이지 않도록)
+- 엔드포인트별 requests/sec, p50/p95/p99, 응답 크기, 최대 RSS를 출력하고 JSON으로 저장
+
+사용 예:
+    python benchmark.py --sizes 100,1000,10000 --requests 200 --output bench.json
+    python benchmark.py --sizes 1000 --concurrency 8 --endpoints all_users,recommend_roommates
+    python benchmark.py --sizes 1000 --compare bench.json      # 이전 결과와 비교
+    python benchmark.py --sizes 1000 --accept-encoding gzip    # 응답 압축 포함 측정 (KB는 압축 후 크기)
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+REGIONS = ['강남구', '서초구', '마포구', '성동구', '관악구', '동작구', '광진구', '송파구', '용산구', '서대문구']
+SEARCH_QUERIES = ['집', '원룸', '전세', '월세', '하숙', '셰어하우스', '부동산', '청년주택']
+
+# SQLite용 스키마 (MySQL 스키마의 컬럼 이름/의미를 그대로 따름)
+SCHEMA = """
+CREATE TABLE User (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    name TEXT
+);
+CREATE TABLE UserProfile (
+    profile_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL UNIQUE,
+    age INTEGER,
+    phone TEXT,
+    photo_url TEXT,
+    is_smoking INTEGER DEFAULT 0,
+    snoring INTEGER DEFAULT 0,
+    introduction TEXT,
+    wishes TEXT,
+    preferred_region TEXT,
+    budget INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE Follow (
+    follow_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    follower_id INTEGER NOT NULL,
+    following_id INTEGER NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (follower_id, following_id)
+);
+CREATE TABLE Review (
+    review_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reviewer_id INTEGER NOT NULL,
+    reviewee_id INTEGER NOT NULL,
+    rating INTEGER NOT NULL,
+    content TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_review_reviewee_id ON Review (reviewee_id, review_id);
+CREATE INDEX idx_userprofile_region_budget ON UserProfile (preferred_region, budget, user_id);
+CREATE INDEX idx_userprofile_region_age ON UserProfile (preferred_region, age, user_id);
+CREATE INDEX idx_userprofile_habits_budget ON UserProfile (is_smoking, snoring, budget, user_id);
+CREATE TABLE UserReviewStats (
+    user_id INTEGER PRIMARY KEY,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_review_created ON Review (created_at);
+-- MySQL의 FROM DUAL 흉내
+CREATE VIEW DUAL AS SELECT 'X' AS DUMMY;
+CREATE TABLE AddressInfo (
+    address_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    address TEXT NOT NULL UNIQUE,
+    latitude REAL,
+    longitude REAL
+);
+"""
+
+
+##################################
+# MySQL 대체: SQLite를 pymysql 연결처럼 감싸기
+##################################
+def translate_sql(query):
+    """
+    app.py의 MySQL 문법을 SQLite 문법으로
+    - %s -> ?
+    - ON DUPLICATE KEY UPDATE col = VALUES(col) -> ON CONFLICT DO UPDATE SET col = excluded.col
+    """
+    query = query.replace('%s', '?')
+    head, sep, update = query.partition('ON DUPLICATE KEY UPDATE')
+    if sep:
+        query = head + 'ON CONFLICT DO UPDATE SET' + re.sub(r'VALUES\((\w+)\)', r'excluded.\1', update)
+    return query
+
+
+class SQLiteCursor:
+    """pymysql 커서 흉내 (%s 파라미터, dict/tuple 행)"""
+
+    def __init__(self, db, dict_rows):
+        self._db = db
+        self._dict_rows = dict_rows
+        self._cursor = None
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def execute(self, query, params=None):
+        self._cursor = self._db.execute(translate_sql(query), tuple(params or ()))
+        self.lastrowid = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def executemany(self, query, seq_of_params):
+        self._cursor = self._db.executemany(translate_sql(query), [tuple(p) for p in seq_of_params])
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description if self._cursor else None
+
+    def _convert(self, row):
+        if row is None or not self._dict_rows:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._convert(row)
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+
+
+class SQLiteConnection:
+    """pymysql 연결 흉내 (app.py와 ConnectionPool이 쓰는 속성만)"""
+
+    server_status = 0
+
+    def __init__(self, path):
+        import pymysql.cursors
+
+        self._dict_cursor = pymysql.cursors.DictCursorMixin
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.create_function('NOW', 0, lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        self.open = True
+
+    def cursor(self, cursor=None):
+        return SQLiteCursor(self._db, cursor is not None and issubclass(cursor, self._dict_cursor))
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self._db.close()
+        self.open = False
+
+
+##################################
+# 외부 API 대체
+##################################
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class StubNaverSession:
+    """네이버 뉴스 검색 API 흉내 (latency초 대기 후 display개 결과, 일부 제목 중복)"""
+
+    def __init__(self, latency):
+        self._latency = latency
+
+    def get(self, url, params=None, timeout=None):
+        time.sleep(self._latency)
+        display = int(params.get('display', 10))
+        query = params.get('query')
+        items = [
+            {"title": f"{query} 뉴스 {i // 2}", "link": f"https://news.example.com/{query}/{i}"}
+            for i in range(display)
+        ]
+        return StubResponse({"items": items})
+
+
+class StubSeries(list):
+    def tolist(self):
+        return list(self)
+
+
+class StubTrendReq:
+    """pytrends TrendReq 흉내"""
+
+    def __init__(self, latency):
+        self._latency = latency
+
+    def trending_searches(self, pn=None):
+        time.sleep(self._latency)
+        return {0: StubSeries(f"검색어 {i}" for i in range(20))}
+
+
+##################################
+# 데이터 생성
+##################################
+def create_images(count):
+    """서로 다른 프로필 사진(JPEG 바이트) count개"""
+    from PIL import Image
+
+    rng = random.Random(0)
+    images = []
+    for _ in range(count):
+        image = Image.new('RGB', (1200, 1600), tuple(rng.randrange(256) for _ in range(3)))
+        # 단색 이미지는 너무 작게 압축되므로 노이즈를 조금 섞음
+        noise = Image.effect_noise((1200, 1600), 40).convert('RGB')
+        image = Image.blend(image, noise, 0.3)
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def seed_database(db_path, app_module, args):
+    """args.size명 기준으로 모든 테이블과 사진 파일 생성"""
+    rng = random.Random(42)
+    size = args.size
+    db = sqlite3.connect(db_path)
+    db.executescript(SCHEMA)
+
+    # 모든 유저는 같은 비밀번호 (해시 한 번만 계산)
+    password_hash = app_module.password_hasher.hash('password')
+    db.executemany(
+        "INSERT INTO User (user_id, username, password, name) VALUES (?, ?, ?, ?)",
+        [(i, f"user{i}", password_hash, f"이름{i}") for i in range(1, size + 1)],
+    )
+
+    photo_urls = [app_module.store_profile_image(image) for image in create_images(args.images)]
+    db.executemany(
+        """INSERT INTO UserProfile (user_id, age, phone, photo_url, is_smoking, snoring,
+                                    introduction, wishes, preferred_region, budget)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [
+            (
+                i, rng.randint(20, 35), f"010-0000-{i % 10000:04d}",
+                photo_urls[i % len(photo_urls)] if photo_urls else None,
+                int(rng.random() < 0.2), int(rng.random() < 0.3),
+                f"안녕하세요 {REGIONS[i % len(REGIONS)]}에 사는 {i}번 유저입니다. " * 3,
+                "깔끔하고 조용한 룸메이트를 원해요. " * 2,
+                rng.choice(REGIONS), rng.randrange(30, 150, 5),
+            )
+            for i in range(1, size + 1)
+        ],
+    )
+
+    follows = set()
+    for follower in range(1, size + 1):
+        for _ in range(min(args.follows, size - 1)):
+            following = rng.randint(1, size)
+            if following != follower:
+                follows.add((follower, following))
+                if rng.random() < 0.5:
+                    follows.add((following, follower))  # 절반은 맞팔
+    db.executemany("INSERT INTO Follow (follower_id, following_id) VALUES (?, ?)", sorted(follows))
+
+    reviews = []
+    for i in range(size * args.reviews):
+        reviewer, reviewee = rng.sample(range(1, size + 1), 2) if size > 1 else (1, 1)
+        created_at = datetime.fromtimestamp(1700000000 + i * 60).strftime('%Y-%m-%d %H:%M:%S')
+        reviews.append((reviewer, reviewee, rng.randint(1, 5), "좋은 룸메이트였어요!", created_at))
+    db.executemany(
+        "INSERT INTO Review (reviewer_id, reviewee_id, rating, content, created_at) VALUES (?, ?, ?, ?, ?)",
+        reviews,
+    )
+    db.execute(
+        """INSERT INTO UserReviewStats (user_id, review_count, rating_sum)
+           SELECT reviewee_id, COUNT(*), SUM(rating) FROM Review GROUP BY reviewee_id"""
+    )
+    db.execute("INSERT OR IGNORE INTO UserReviewStats (user_id) SELECT user_id FROM User")
+
+    addresses = [
+        (f"서울특별시 {REGIONS[i % len(REGIONS)]} 테스트로 {i}", 37.45 + rng.random() * 0.2, 126.85 + rng.random() * 0.3)
+        for i in range(args.addresses or size)
+    ]
+    db.executemany("INSERT INTO AddressInfo (address, latitude, longitude) VALUES (?, ?, ?)", addresses)
+
+    db.commit()
+    db.close()
+    return [address for address, _, _ in addresses]
+
+
+##################################
+# 엔드포인트 정의
+##################################
+def build_endpoints(size, addresses):
+    """(이름, 메서드, 요청 생성 함수) 목록, 요청 생성 함수는 (path, json) 반환"""
+    rng = random.Random(7)
+    counter = iter(range(10 ** 9))
+
+    def user_id():
+        return rng.randint(1, size)
+
+    return [
+        ('login', 'POST', lambda: ('/login', {"username": f"user{user_id()}", "password": "password"})),
+        ('all_users', 'GET', lambda: ('/all_users', None)),
+        ('all_users_photo_url', 'GET', lambda: ('/all_users?photo=url', None)),
+        ('all_users_slim', 'GET', lambda: ('/all_users?fields=user_id,age,preferred_region,budget', None)),
+        ('search_profiles', 'GET', lambda: (
+            f'/search_profiles?region={rng.choice(REGIONS)}&budget_min=50&budget_max=100'
+            f'&is_smoking=0&sort=budget&photo=url', None)),
+        ('all_users_page', 'GET', lambda: (f'/all_users?limit=50&after={user_id()}', None)),
+        ('user_name', 'GET', lambda: ('/user_name', None)),
+        ('profile_detail', 'POST', lambda: ('/profile_detail', {"user_id": user_id()})),
+        ('profiles_batch', 'POST', lambda: ('/profiles', {
+            "user_ids": [user_id() for _ in range(20)], "fields": ["name", "age", "preferred_region", "photo"],
+            "photo": "url"})),
+        ('profile_update', 'PUT', lambda: ('/profile', {
+            "user_id": user_id(), "age": rng.randint(20, 35), "budget": rng.randrange(30, 150, 5),
+            "preferred_region": rng.choice(REGIONS), "introduction": "수정된 소개", "wishes": "조용한 분",
+        })),
+        ('recommend_roommates', 'POST', lambda: ('/recommend_roommates', {"user_id": user_id()})),
+        ('recommend_roommates_text', 'POST', lambda: ('/recommend_roommates', {
+            "user_id": user_id(), "mode": "blend", "fields": ["age", "preferred_region", "budget"]})),
+        ('recommend_roommates_slim', 'POST', lambda: ('/recommend_roommates', {
+            "user_id": user_id(), "fields": ["age", "preferred_region", "budget"]})),
+        ('following', 'POST', lambda: ('/following', {"follower_id": user_id()})),
+        ('follow', 'POST', lambda: ('/follow', {"follower_id": user_id(), "following_id": user_id()})),
+        ('unfollow', 'POST', lambda: ('/unfollow', {"follower_id": user_id(), "following_id": user_id()})),
+        ('review', 'POST', lambda: ('/review', {"reviewer_id": user_id(), "reviewee_id": user_id(),
+                                                "rating": rng.randint(1, 5), "content": "벤치마크 리뷰"})),
+        ('reviews', 'GET', lambda: ('/reviews', None)),
+        ('get_coordinates', 'POST', lambda: ('/get-coordinates', {"address": rng.choice(addresses)})),
+        ('get_coordinates_batch', 'POST', lambda: ('/get-coordinates/batch', {
+            "addresses": rng.sample(addresses, min(30, len(addresses))) + ["없는 주소"]})),
+        ('nearby', 'POST', lambda: ('/nearby', {"latitude": 37.45 + rng.random() * 0.2,
+                                                "longitude": 126.85 + rng.random() * 0.3, "radius_m": 2000})),
+        ('search_hit', 'GET', lambda: (f'/search?query={rng.choice(SEARCH_QUERIES)}', None)),
+        ('search_miss', 'GET', lambda: (f'/search?query=q{next(counter)}', None)),
+        ('search_batch', 'POST', lambda: ('/search/batch', {"queries": rng.sample(SEARCH_QUERIES, 4)})),
+        ('trending_searches', 'GET', lambda: ('/trending_searches', None)),
+    ]
+
+
+##################################
+# 측정
+##################################
+class RSSSampler:
+    """백그라운드 스레드로 RSS(상주 메모리)를 주기적으로 읽어 최댓값 기록"""
+
+    def __init__(self, interval=0.005):
+        self._interval = interval
+        self._stop = threading.Event()
+        self.peak = self.current()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            # /proc이 없는 OS: 프로세스 전체 최대값으로 대신 (Linux는 KB, macOS는 byte)
+            import resource
+
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == 'darwin' else peak * 1024
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.peak = max(self.peak, self.current())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def percentile(sorted_values, q):
+    """nearest-rank 백분위수"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_endpoint(flask_app, method, make_request, requests_count, concurrency, accept_encoding=None):
+    local = threading.local()
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+
+    def one_request(_):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = flask_app.test_client()
+        path, payload = make_request()
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=payload, headers=headers)
+        body = response.get_data()
+        elapsed = time.perf_counter() - started
+        return elapsed, len(body), response.status_code
+
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(one_request, range(requests_count)))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed for elapsed, _, _ in results)
+    errors = sum(1 for _, _, status in results if status >= 400)
+    return {
+        "requests": requests_count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": requests_count / wall if wall else None,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "avg_response_bytes": sum(size for _, size, _ in results) / len(results),
+        "peak_rss_mb": rss.peak / (1024 * 1024),
+    }
+
+
+def run_size(args):
+    """(자식 프로세스) 데이터 크기 하나에 대해 모든 엔드포인트 측정, 결과를 stdout에 JSON으로"""
+    workdir = tempfile.mkdtemp(prefix='madweek_bench_')
+    os.chdir(workdir)  # uploads/ 는 작업 디렉터리 기준
+    sys.path.insert(0, APP_DIR)
+
+    import pymysql
+    import app as app_module
+
+    db_path = os.path.join(workdir, 'bench.sqlite3')
+    started = time.perf_counter()
+    addresses = seed_database(db_path, app_module, args)
+    print(f"[size={args.size}] seeded in {time.perf_counter() - started:.1f}s ({workdir})", file=sys.stderr)
+
+    # DB와 외부 API를 대체
+    pymysql.connect = lambda **kwargs: SQLiteConnection(db_path)
+    app_module._naver_session = StubNaverSession(args.upstream_latency_ms / 1000)
+    app_module._pytrends = StubTrendReq(args.upstream_latency_ms / 1000)
+
+    selected = set(args.endpoints.split(',')) if args.endpoints else None
+    results = []
+    try:
+        for name, method, make_request in build_endpoints(args.size, addresses):
+            if selected and name not in selected:
+                continue
+            # 워밍업 (커넥션 풀, 인덱스, 캐시 채우기)
+            run_endpoint(app_module.app, method, make_request, args.warmup, 1)
+            result = run_endpoint(app_module.app, method, make_request, args.requests, args.concurrency,
+                                  args.accept_encoding)
+            result.update({"size": args.size, "endpoint": name})
+            results.append(result)
+            print(f"[size={args.size}] {name:22s} {result['rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+                  f"p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}", file=sys.stderr)
+    finally:
+        os.chdir(APP_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    json.dump(results, sys.stdout)
+
+
+def print_table(results, baseline=None):
+    baseline_by_key = {(r['size'], r['endpoint']): r for r in (baseline or [])}
+    header = f"{'size':>7} {'endpoint':22s} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'KB':>9} {'RSS MB':>8} {'err':>4}"
+    if baseline is not None:
+        header += f" {'Δreq/s':>8} {'Δp50':>8}"
+    print(header)
+    for r in results:
+        line = (f"{r['size']:>7} {r['endpoint']:22s} {r['rps']:9.1f} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+                f"{r['p99_ms']:9.2f} {r['avg_response_bytes'] / 1024:9.1f} {r['peak_rss_mb']:8.1f} {r['errors']:>4}")
+        old = baseline_by_key.get((r['size'], r['endpoint']))
+        if baseline is not None and old:
+            line += f" {(r['rps'] / old['rps'] - 1) * 100:+7.1f}% {(r['p50_ms'] / old['p50_ms'] - 1) * 100:+7.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py 라우트 벤치마크")
+    parser.add_argument("--sizes", default="100,1000", help="유저 수 목록 (쉼표 구분)")
+    parser.add_argument("--requests", type=int, default=200, help="엔드포인트별 측정 요청 수")
+    parser.add_argument("--warmup", type=int, default=10, help="엔드포인트별 워밍업 요청 수")
+    parser.add_argument("--concurrency", type=int, default=1, help="동시 요청 스레드 수")
+    parser.add_argument("--endpoints", default=None, help="측정할 엔드포인트 이름 (쉼표 구분, 기본: 전체)")
+    parser.add_argument("--follows", type=int, default=10, help="유저당 팔로우 수")
+    parser.add_argument("--reviews", type=int, default=2, help="유저당 리뷰 수")
+    parser.add_argument("--addresses", type=int, default=0, help="주소 수 (기본: 유저 수)")
+    parser.add_argument("--images", type=int, default=10, help="서로 다른 프로필 사진 수")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50, help="가짜 외부 API 응답 지연")
+    parser.add_argument("--accept-encoding", default=None, help="요청에 넣을 Accept-Encoding (예: gzip, br)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--size", type=int, default=None, help=argparse.SUPPRESS)  # 자식 프로세스용
+    args = parser.parse_args()
+
+    if args.size is not None:
+        run_size(args)
+        return
+
+    # 크기별로 새 프로세스에서 실행
+    results = []
+    passthrough = sys.argv[1:]
+    for size in [int(s) for s in args.sizes.split(',')]:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *passthrough, "--size", str(size)],
+            stdout=subprocess.PIPE, check=True, text=True,
+        )
+        results.extend(json.loads(completed.stdout))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "git_commit": _git_commit(),
+            "args": {k: v for k, v in vars(args).items() if k not in ('size', 'output', 'compare')},
+        },
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    main()
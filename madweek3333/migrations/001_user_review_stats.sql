@@ -0,0 +1,36 @@
+-- 유저별 리뷰 집계 (개수, 평점 합계)
+-- /review 작성 시 같은 트랜잭션에서 갱신, /profile_detail은 이 테이블로 평균 평점 계산
+-- 여러 번 실행해도 됨 (테이블/인덱스가 이미 있으면 건너뜀, 집계는 다시 채움)
+CREATE TABLE IF NOT EXISTS UserReviewStats (
+    user_id INT NOT NULL PRIMARY KEY,
+    review_count INT NOT NULL DEFAULT 0,
+    rating_sum INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- 기존 리뷰로 집계 채우기
+INSERT INTO UserReviewStats (user_id, review_count, rating_sum)
+SELECT reviewee_id, COUNT(*), SUM(rating)
+FROM Review
+GROUP BY reviewee_id
+ON DUPLICATE KEY UPDATE
+    review_count = VALUES(review_count),
+    rating_sum = VALUES(rating_sum);
+
+-- 리뷰가 없는 유저도 0으로 채움 (/profile_detail은 집계 행이 없을 때만 Review를 직접 집계)
+-- 이후 가입하는 유저는 /add_user가 같은 트랜잭션에서 행을 만듦
+INSERT IGNORE INTO UserReviewStats (user_id)
+SELECT user_id FROM User;
+
+-- /profile_detail 리뷰 페이지 조회용 (reviewee_id별 최신순)
+-- MySQL은 CREATE INDEX IF NOT EXISTS가 없으므로 information_schema에서 확인 후 생성
+SET @index_exists = (
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'Review' AND index_name = 'idx_review_reviewee_id'
+);
+SET @ddl = IF(@index_exists = 0,
+    'CREATE INDEX idx_review_reviewee_id ON Review (reviewee_id, review_id)',
+    'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,39 @@
+-- /search_profiles 조건 검색용 복합 인덱스
+-- 같음(=) 조건 컬럼을 앞에, 범위/정렬 컬럼을 뒤에 두고 user_id로 동순위 정렬 (keyset 페이지네이션)
+-- 여러 번 실행해도 됨: MySQL은 CREATE INDEX IF NOT EXISTS가 없으므로 information_schema에서 확인 후 생성
+
+-- 지역 + 예산 범위 / 예산순 정렬
+SET @index_exists = (
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'UserProfile' AND index_name = 'idx_userprofile_region_budget'
+);
+SET @ddl = IF(@index_exists = 0,
+    'CREATE INDEX idx_userprofile_region_budget ON UserProfile (preferred_region, budget, user_id)',
+    'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- 지역 + 나이 범위 / 나이순 정렬
+SET @index_exists = (
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'UserProfile' AND index_name = 'idx_userprofile_region_age'
+);
+SET @ddl = IF(@index_exists = 0,
+    'CREATE INDEX idx_userprofile_region_age ON UserProfile (preferred_region, age, user_id)',
+    'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- 지역 없이 흡연/코골이 + 예산 범위
+SET @index_exists = (
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'UserProfile' AND index_name = 'idx_userprofile_habits_budget'
+);
+SET @ddl = IF(@index_exists = 0,
+    'CREATE INDEX idx_userprofile_habits_budget ON UserProfile (is_smoking, snoring, budget, user_id)',
+    'DO 0');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
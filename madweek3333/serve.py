@@ -0,0 +1,245 @@
+"""
+운영용 pre-fork 서버
+
+- 부모 프로세스에서 app을 import하고 메모리 인덱스(팔로우 그래프, 좌표, 룸메이트 추천)를 미리 로드한 뒤
+  워커 N개를 fork -> 워커들이 copy-on-write로 공유 (gc.freeze로 GC가 공유 페이지를 건드리지 않게 함)
+- 리슨 소켓은 부모가 열고 워커들이 같은 소켓에서 accept (각 워커는 스레드 서버)
+- 워커는 --max-requests개를 처리하면 새 요청을 그만 받고 처리 중인 요청을 마친 뒤 종료, 부모가 새로 fork
+- SIGTERM/SIGINT: 워커들이 새 요청을 그만 받고 처리 중인 요청을 마친 뒤 종료 (--graceful-timeout 후 강제 종료)
+- DB 커넥션 풀과 bcrypt 프로세스 풀은 fork 이후 워커에서 새로 만들어짐
+  bcrypt 풀은 워커마다 하나씩 생기므로, BCRYPT_WORKERS를 따로 지정하지 않으면
+  CPU 코어 수 // 워커 수 (최소 1)로 맞춤 (기본값 CPU 코어 수 그대로면 워커 N개 x 프로세스 N개)
+
+사용 예:
+    python serve.py --port 5002
+    python serve.py --workers 8 --max-requests 10000 --graceful-timeout 30
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+logger = logging.getLogger("serve")
+
+
+class RequestCounter:
+    """
+    WSGI 미들웨어: 처리한 요청 수와 처리 중인 요청 수
+    - max_requests에 도달하면 on_limit()을 한 번 호출 (워커 재시작)
+    - 스트리밍 응답은 응답 본문을 다 보낸 뒤(close) 처리 완료로 셈
+    """
+
+    def __init__(self, wsgi_app, max_requests, on_limit):
+        self._app = wsgi_app
+        self._max_requests = max_requests
+        self._on_limit = on_limit
+        self._lock = threading.Condition()
+        self.handled = 0
+        self.in_flight = 0
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.handled += 1
+            self.in_flight += 1
+            limit_reached = self._max_requests and self.handled == self._max_requests
+        if limit_reached:
+            self._on_limit()
+        try:
+            iterable = self._app(environ, start_response)
+        except BaseException:
+            self._done()
+            raise
+        return ClosingIterator(iterable, [self._done])
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._lock.notify_all()
+
+    def wait_idle(self, timeout):
+        """처리 중인 요청이 끝날 때까지 최대 timeout초 대기, 다 끝났으면 True"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self.in_flight > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+
+def run_worker(listener, args):
+    """워커 프로세스: listener에서 요청을 받다가 종료 신호나 max_requests에서 graceful 종료"""
+    import app as app_module
+
+    # 워커마다 재시작 시점을 흩어서 동시에 재시작하지 않도록
+    max_requests = args.max_requests
+    if max_requests and args.max_requests_jitter:
+        max_requests += random.randint(0, args.max_requests_jitter)
+
+    server = None
+    stopping = threading.Event()
+
+    def stop(*_):
+        # serve_forever와 같은 스레드에서 shutdown()을 부르면 멈추므로 별도 스레드에서 호출
+        if not stopping.is_set():
+            stopping.set()
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    counter = RequestCounter(app_module.app, max_requests, stop)
+    server = make_server(args.host, args.port, counter, threaded=True, fd=listener.fileno())
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("worker %d started (max_requests=%s)", os.getpid(), max_requests or "unlimited")
+    server.serve_forever()
+
+    if not counter.wait_idle(args.graceful_timeout):
+        logger.warning("worker %d: %d requests still running after %.0fs",
+                       os.getpid(), counter.in_flight, args.graceful_timeout)
+    logger.info("worker %d exiting after %d requests", os.getpid(), counter.handled)
+
+
+class Arbiter:
+    """부모 프로세스: 워커 fork, 죽은 워커 다시 fork, 종료 신호를 받으면 워커들을 정리"""
+
+    def __init__(self, listener, args):
+        self.listener = listener
+        self.args = args
+        self.workers = set()
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return
+        # 워커: 부모의 신호 처리기를 쓰지 않음
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            run_worker(self.listener, self.args)
+        except Exception:
+            logger.exception("worker %d crashed", os.getpid())
+            exit_code = 1
+        finally:
+            # 부모에게서 물려받은 atexit 처리기 등을 실행하지 않고 종료
+            logging.shutdown()
+            os._exit(exit_code)
+
+    def stop(self, *_):
+        if not self.stopping:
+            logger.info("shutting down %d workers", len(self.workers))
+            self.stopping = True
+            for pid in self.workers:
+                self._kill(pid, signal.SIGTERM)
+
+    @staticmethod
+    def _kill(pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def reap(self):
+        """종료된 워커를 정리하고 pid 목록 반환"""
+        exited = []
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            self.workers.discard(pid)
+            exited.append(pid)
+        return exited
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        while not self.stopping:
+            time.sleep(0.5)
+            for pid in self.reap():
+                if not self.stopping:
+                    logger.info("worker %d exited, starting a new one", pid)
+                    self.spawn()
+
+        # graceful 종료: 워커가 처리 중인 요청을 마칠 때까지 대기, 시간이 지나면 강제 종료
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in self.workers:
+            logger.warning("killing worker %d", pid)
+            self._kill(pid, signal.SIGKILL)
+        while self.workers:
+            self.reap()
+            time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py pre-fork 서버")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 5002)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", os.cpu_count() or 1)),
+                        help="워커 프로세스 수 (기본값: CPU 코어 수)")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", 10000)),
+                        help="워커가 이만큼 처리하면 재시작 (0이면 재시작 안 함)")
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", 1000)),
+                        help="워커별로 max-requests에 0~이 값을 더함")
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("GRACEFUL_TIMEOUT", 30)),
+                        help="종료/재시작 시 처리 중인 요청을 기다리는 시간(초)")
+    parser.add_argument("--backlog", type=int, default=2048, help="listen backlog")
+    parser.add_argument("--no-preload", action="store_true", help="인덱스를 미리 로드하지 않음 (워커가 첫 요청 때 로드)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+
+    # bcrypt 프로세스 풀 크기: 전체 프로세스 수가 CPU 코어 수 정도가 되도록 (app import 전에 설정)
+    bcrypt_workers = os.environ.setdefault(
+        "BCRYPT_WORKERS", str(max(1, (os.cpu_count() or 1) // max(args.workers, 1)))
+    )
+    logger.info("bcrypt workers per process: %s", bcrypt_workers)
+
+    # 워커가 fork 후 그대로 쓰도록 부모에서 미리 import/로드
+    import app as app_module
+
+    if not args.no_preload:
+        for name, result in app_module.preload().items():
+            if isinstance(result, float):
+                logger.info("preloaded %s in %.1f ms", name, result * 1000)
+            else:
+                logger.warning("preload %s %s (workers will load it on first use)", name, result)
+
+    listener = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(args.backlog)
+    listener.set_inheritable(True)
+    logger.info("listening on %s:%d with %d workers", args.host, args.port, args.workers)
+
+    # 지금까지 만든 객체를 GC 대상에서 빼서, 워커의 GC가 공유 페이지를 복사하게 만들지 않음
+    gc.collect()
+    gc.freeze()
+
+    Arbiter(listener, args).run()
+    listener.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+app.py 콜드 스타트(import) 시간 측정
+
+- 새 파이썬 프로세스에서 `python -X importtime -c "import app"` 실행
+- 전체 시간과 app이 직접 import하는 모듈별 누적 시간(상위 N개)을 출력
+- --max-seconds를 넘으면 종료 코드 1 (CI에서 회귀 감지용)
+
+사용 예:
+    python startup_time.py
+    python startup_time.py --runs 5 --top 15 --json
+    python startup_time.py --max-seconds 0.5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_once():
+    """
+    한 번 측정
+    - 반환값: (app import 시간(초), [(모듈 이름, 누적 시간(초)), ...])
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app; print(app.APP_IMPORT_SECONDS)"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+
+    # 형식: "import time:  self [us] | cumulative | imported package"
+    # 하위 모듈이 먼저 출력되고 마지막에 상위 모듈(들여쓰기 0)이 출력됨
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            if name.strip() == "app":
+                break
+            modules = []  # 인터프리터 시작 시 import된 모듈의 하위 모듈은 버림
+        elif depth == 1:
+            # app이 직접 import한 모듈
+            modules.append((name.strip(), int(cumulative) / 1e6))
+
+    app_seconds = float(result.stdout.strip().splitlines()[-1])
+    return app_seconds, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py import 시간 측정")
+    parser.add_argument("--runs", type=int, default=3, help="측정 횟수 (가장 빠른 결과 사용)")
+    parser.add_argument("--top", type=int, default=10, help="출력할 모듈 수")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    parser.add_argument("--max-seconds", type=float, default=None, help="이 시간을 넘으면 종료 코드 1")
+    args = parser.parse_args()
+
+    # 디스크 캐시 등의 영향을 줄이기 위해 여러 번 측정해서 가장 빠른 결과 사용
+    app_seconds, modules = min((measure_once() for _ in range(args.runs)), key=lambda r: r[0])
+    modules = sorted(modules, key=lambda m: m[1], reverse=True)[:args.top]
+
+    if args.json:
+        print(json.dumps({
+            "app_import_seconds": app_seconds,
+            "modules": [{"name": name, "cumulative_seconds": seconds} for name, seconds in modules],
+        }, indent=2))
+    else:
+        print(f"app import: {app_seconds * 1000:.1f} ms")
+        for name, seconds in modules:
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    if args.max_seconds is not None and app_seconds > args.max_seconds:
+        print(f"app import가 {args.max_seconds}초를 넘었습니다.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()